@@ -172,9 +172,10 @@ def copy_dropdeg(
     return(True)
 
 
-def get_mask(infile, huge_cube_workaround=True):
+def get_mask(infile, huge_cube_workaround=True, return_memory_issue=False):
     """
     Get a mask from a CASA image file. Includes a switch for large cubes, where getchunk can segfault.
+    With return_memory_issue, also return whether the cube needed the per-channel workaround.
     """
 
     #if huge_cube_workaround:
@@ -245,6 +246,8 @@ def get_mask(infile, huge_cube_workaround=True):
     
     assert np.all(mask.shape == cube_shape)
     
+    if return_memory_issue:
+        return mask, has_memory_issue
     return mask
 
 
@@ -267,7 +270,13 @@ def copy_mask(infile, outfile, huge_cube_workaround=True):
     #    mask = myia.putregion(pixelmask=mask)
     #    myia.close()
     
-    mask = get_mask(infile)
+    # The outfile has the same shape as the infile, so whether it
+    # needs the per-channel workaround is already known from reading
+    # the mask. No need to probe the outfile with another full read.
+
+    mask, has_memory_issue = get_mask(
+        infile, huge_cube_workaround=huge_cube_workaround,
+        return_memory_issue=True)
     
     # use putregion to update pixel mask
     
@@ -282,10 +291,6 @@ def copy_mask(infile, outfile, huge_cube_workaround=True):
         myia.close()
         raise Exception('Error! The infile and outfile have different dimensions! Cannot copy mask.')
     
-    has_memory_issue = check_getchunk_putchunk_memory_issue(
-        outfile, myia=myia, 
-        huge_cube_workaround=huge_cube_workaround)
-    
     if not has_memory_issue: # getchunk was successful, no memory issue
         myia.putregion(pixelmask=mask)
     else: # getchunk was unsuccessful, has memory issue
@@ -443,6 +448,15 @@ def export_and_cleanup(
             logger.error("Output exists and overwrite set to false - "+outfile)
             return(False)
 
+    # Get the data min and max from the CASA image, which already
+    # skips masked pixels (written as NaN in the FITS file). This way
+    # the FITS data never need to be read back.
+
+    myia = au.createCasaTool(casaStuff.iatool)
+    myia.open(infile)
+    stats = myia.statistics(verbose=False)
+    myia.close()
+
     casaStuff.exportfits(imagename=infile,
                     fitsimage=outfile,
                     velocity=True,
@@ -451,45 +465,52 @@ def export_and_cleanup(
                     dropdeg=True,
                     bitpix=-32)
 
-    # Clean up headers
+    # Clean up headers. Open in update mode with the data memory
+    # mapped so that only the header is rewritten on close, rather
+    # than reading the whole cube and writing it out a second time.
 
-    hdu = pyfits.open(outfile)
+    hdu = pyfits.open(outfile, mode='update', memmap=True)
 
     hdr = hdu[0].header
-    data = hdu[0].data
 
     # Cards to remove by default
 
     for card in ['BLANK','DATE-OBS','OBSERVER','O_BLANK','O_BSCALE',
                  'O_BZERO','OBSRA','OBSDEC','OBSGEO-X','OBSGEO-Y','OBSGEO-Z',
                  'DISTANCE']:
-        if card in hdr.keys():
+        if card in hdr:
             hdr.remove(card)
 
     # User cards to remove
 
     for card in remove_cards:
-        if card in hdr.keys():
+        if card in hdr:
             hdr.remove(card)
 
-    # Delete history
+    # Delete history. Deleting a commentary keyword removes all of
+    # its cards at once.
 
     if zap_history:
-        while 'HISTORY' in hdr.keys():
-            hdr.remove('HISTORY')
+        if 'HISTORY' in hdr:
+            del hdr['HISTORY']
 
     # Add history
 
     for history_line in add_history:
-        add_history(history_line)
+        hdr.add_history(history_line)
 
     for card in add_cards:
         hdr[card] = add_cards[card]
 
     # Get the data min and max right
 
-    datamax = np.nanmax(data)
-    datamin = np.nanmin(data)
+    if len(stats.get('npts', [])) > 0 and stats['npts'][0] > 0:
+        datamax = float(stats['max'][0])
+        datamin = float(stats['min'][0])
+    else:
+        data = hdu[0].data
+        datamax = np.nanmax(data)
+        datamin = np.nanmin(data)
     hdr['DATAMAX'] = datamax
     hdr['DATAMIN'] = datamin
 
@@ -515,8 +536,8 @@ def export_and_cleanup(
     # Never forget where you came from
     hdr['COMMENT'] = 'Produced with PHANGS-ALMA pipeline version ' + pipeVer
 
-    # Overwrite
-    hdu.writeto(outfile, clobber=True)
+    # Write the header back in place
+    hdu.close()
 
     return()
 
@@ -559,17 +580,25 @@ def trim_cube(
 
     pix_per_beam = bmaj*1.0 / pixel_as*1.0
 
+    # Only a rebinned cube needs an intermediate file. Otherwise
+    # measure the extent and cut the subimage straight from the
+    # input, rather than first copying the whole cube.
+
     if pix_per_beam > 6:
+        source_file = outfile+'.temp'
         casaStuff.imrebin(
             imagename=infile,
-            outfile=outfile+'.temp',
+            outfile=source_file,
             factor=[2,2,1],
             crop=True,
             dropdeg=True,
             overwrite=overwrite,
             )
+    elif os.path.abspath(infile) == os.path.abspath(outfile):
+        source_file = outfile+'.temp'
+        os.system('cp -r '+infile+' '+source_file)
     else:
-        os.system('cp -r '+infile+' '+outfile+'.temp')
+        source_file = infile
 
     # Figure out the extent of the image inside the cube
 
@@ -580,20 +609,25 @@ def trim_cube(
     #
     #mask = get_mask(outfile + '.temp_deg')
     
-    mask = get_mask(outfile + '.temp')
+    mask = get_mask(source_file)
+
+    # Collapse the cube to the (x, y) plane and to the spectral axis,
+    # one pass over the mask each, and take the x and y extents from
+    # the small plane rather than from the full cube again.
 
     #mask_spec_x = np.sum(np.sum(mask*1.0,axis=2),axis=1) > 0
-    mask_spec_x = np.any(mask, axis=tuple([i for i, x in enumerate(list(mask.shape)) if i != 0]))
+    mask_xy = np.any(mask, axis=tuple(range(2, mask.ndim)))
+    mask_spec_x = np.any(mask_xy, axis=1)
     xmin = np.max([0,np.min(np.where(mask_spec_x))-pad])
     xmax = np.min([np.max(np.where(mask_spec_x))+pad,mask.shape[0]-1])
 
     #mask_spec_y = np.sum(np.sum(mask*1.0,axis=2),axis=0) > 0
-    mask_spec_y = np.any(mask, axis=tuple([i for i, x in enumerate(list(mask.shape)) if i != 1]))
+    mask_spec_y = np.any(mask_xy, axis=0)
     ymin = np.max([0,np.min(np.where(mask_spec_y))-pad])
     ymax = np.min([np.max(np.where(mask_spec_y))+pad,mask.shape[1]-1])
 
     #mask_spec_z = np.sum(np.sum(mask*1.0,axis=0),axis=0) > 0
-    mask_spec_z = np.any(mask, axis=tuple([i for i, x in enumerate(list(mask.shape)) if i != 2]))
+    mask_spec_z = np.any(mask, axis=tuple([i for i in range(mask.ndim) if i != 2]))
     zmin = np.max([0,np.min(np.where(mask_spec_z))-pad])
     zmax = np.min([np.max(np.where(mask_spec_z))+pad,mask.shape[2]-1])
 
@@ -606,13 +640,14 @@ def trim_cube(
     if overwrite:
         os.system('rm -rf '+outfile)
         casaStuff.imsubimage(
-            imagename=outfile+'.temp',
+            imagename=source_file,
             outfile=outfile,
             box=box_string,
             chans=chan_string,
             )
 
-    os.system('rm -rf '+outfile+'.temp')
+    if source_file != infile:
+        os.system('rm -rf '+source_file)
 
     return(True)
 
@@ -853,11 +888,10 @@ def convolve_to_round_beam(
         return(None)
     pixel_as = abs(hdr['incr'][0]/np.pi*180.0*3600.)
 
-    if 'perplanebeams' in hdr.keys():
-        beamnames = hdr['perplanebeams']['beams'].keys()
-        majorlist = [hdr['perplanebeams']['beams'][b]['*0']['major']['value']
-                     for b in beamnames]
-        bmaj = np.max(majorlist)
+    if 'perplanebeams' in hdr:
+        # One entry per channel, so walk the values directly.
+        bmaj = max(this_beam['*0']['major']['value']
+                   for this_beam in hdr['perplanebeams']['beams'].values())
     else:
         if (hdr['restoringbeam']['major']['unit'] != 'arcsec'):
             logger.error("Based on CASA experience. I expected units of arcseconds for the beam. I did not find this.")
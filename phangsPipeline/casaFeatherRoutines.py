@@ -288,8 +288,8 @@ def feather_two_cubes(
         myia.close()
 
         if not np.all(interf_shape == sd_shape):
-            print('interf_shape', interf_shape)
-            print('sd_shape', sd_shape)
+            logger.error('interf_shape '+str(interf_shape))
+            logger.error('sd_shape '+str(sd_shape))
             raise Exception('Error! The interf_file '+interf_file+
                 ' and sd_file '+sd_file+
                 ' have different dimensions! Cannot run feather_two_cubes!')
@@ -313,7 +313,13 @@ def feather_two_cubes(
             # CASA calls unmasked values True and masked values False. The
             # region with values in both cubes is the product.
             
-            combined_mask = sd_mask*interf_mask
+            # Build the blanking mask once as a boolean array and
+            # reuse it, rather than re-deriving it from the combined
+            # mask for every test and assignment.
+
+            blank_mask = np.logical_not(np.logical_and(sd_mask, interf_mask))
+            sd_mask = None
+            interf_mask = None
             
             # This isn't a great solution. Just zero out the masked
             # values. It will do what we want in the FFT but the CASA mask
@@ -321,84 +327,64 @@ def feather_two_cubes(
             # complicated, though, because you can't directly manipulate
             # pixel masks for some reason.
             
-            if np.sum(combined_mask == False) > 0:
+            if np.any(blank_mask):
                 myia.open(current_interf_file)
                 interf_data = myia.getchunk()
-                interf_data[combined_mask == False] = 0.0
+                interf_data[blank_mask] = 0.0
                 myia.putchunk(interf_data)
                 myia.close()
+                interf_data = None
             
                 myia.open(current_sd_file)
                 sd_data = myia.getchunk()
-                sd_data[combined_mask == False] = 0.0
+                sd_data[blank_mask] = 0.0
                 myia.putchunk(sd_data)
                 myia.close()
+                sd_data = None
         
         else:
             
             assert len(interf_shape) in [3, 4]
-            
+
+            # Work one plane at a time, keeping both images open for
+            # the whole loop rather than reopening them for every
+            # channel.
+
+            nchan = interf_shape[2]
             if len(interf_shape) == 3:
-                nchan = interf_shape[2]
-                for ichan in range(nchan):
-                    blc = [0, 0, ichan] # [X, Y, CHANNEL]
-                    trc = [-1, -1, ichan] # [X, Y, CHANNEL]
-                    myia.open(current_interf_file)
-                    interf_data_per_chan = myia.getchunk(blc, trc)
-                    interf_mask_per_chan = myia.getchunk(blc, trc, getmask=True)
-                    myia.close()
-                    myia.open(current_sd_file)
-                    sd_data_per_chan = myia.getchunk(blc, trc)
-                    sd_mask_per_chan = myia.getchunk(blc, trc, getmask=True)
-                    myia.close()
-
-                    combined_mask_per_chan = interf_mask_per_chan * sd_mask_per_chan
+                plane_list = [([0, 0, ichan], [-1, -1, ichan])
+                              for ichan in range(nchan)]
+            else:
+                nstokes = interf_shape[3] # It's okay if Spectral and Stokes axes are swapped.
+                plane_list = [([0, 0, ichan, istokes], [-1, -1, ichan, istokes])
+                              for istokes in range(nstokes)
+                              for ichan in range(nchan)]
+
+            interf_ia = au.createCasaTool(casaStuff.iatool)
+            sd_ia = au.createCasaTool(casaStuff.iatool)
+            interf_ia.open(current_interf_file)
+            sd_ia.open(current_sd_file)
+
+            try:
+                for blc, trc in plane_list:
+                    interf_data_per_chan = interf_ia.getchunk(blc, trc)
+                    interf_mask_per_chan = interf_ia.getchunk(blc, trc, getmask=True)
+                    sd_data_per_chan = sd_ia.getchunk(blc, trc)
+                    sd_mask_per_chan = sd_ia.getchunk(blc, trc, getmask=True)
 
                     # CASA calls unmasked values True and masked values False. The
                     # region with values in both cubes is the product.
-                    
-                    boolean_mask_per_chan = (combined_mask_per_chan == False)
+
+                    boolean_mask_per_chan = np.logical_not(
+                        np.logical_and(interf_mask_per_chan, sd_mask_per_chan))
                     if np.any(boolean_mask_per_chan):
                         interf_data_per_chan[boolean_mask_per_chan] = 0.0
                         sd_data_per_chan[boolean_mask_per_chan] = 0.0
-                        myia.open(current_interf_file)
-                        myia.putchunk(interf_data_per_chan, blc)
-                        myia.close()
-                        myia.open(current_sd_file)
-                        myia.putchunk(sd_data_per_chan, blc)
-                        myia.close()
-            
-            elif len(interf_shape) == 4:
-                nchan = interf_shape[2]
-                nstokes = interf_shape[3] # It's okay if Spectral and Stokes axes are swapped.
-                for istokes in range(nstokes):
-                    for ichan in range(nchan):
-                        blc = [0, 0, ichan, istokes] # [X, Y, CHANNEL]
-                        trc = [-1, -1, ichan, istokes] # [X, Y, CHANNEL]
-                        myia.open(current_interf_file)
-                        interf_data_per_chan = myia.getchunk(blc, trc)
-                        interf_mask_per_chan = myia.getchunk(blc, trc, getmask=True)
-                        myia.close()
-                        myia.open(current_sd_file)
-                        sd_data_per_chan = myia.getchunk(blc, trc)
-                        sd_mask_per_chan = myia.getchunk(blc, trc, getmask=True)
-                        myia.close()
-
-                        combined_mask_per_chan = interf_mask_per_chan * sd_mask_per_chan
-
-                        # CASA calls unmasked values True and masked values False. The
-                        # region with values in both cubes is the product.
-                        
-                        boolean_mask_per_chan = (combined_mask_per_chan == False)
-                        if np.any(boolean_mask_per_chan):
-                            interf_data_per_chan[boolean_mask_per_chan] = 0.0
-                            sd_data_per_chan[boolean_mask_per_chan] = 0.0
-                            myia.open(current_interf_file)
-                            myia.putchunk(interf_data_per_chan, blc)
-                            myia.close()
-                            myia.open(current_sd_file)
-                            myia.putchunk(sd_data_per_chan, blc)
-                            myia.close()
+                        interf_ia.putchunk(interf_data_per_chan, blc)
+                        sd_ia.putchunk(sd_data_per_chan, blc)
+            finally:
+                interf_ia.close()
+                sd_ia.close()
 
     else:
         
@@ -13,12 +13,19 @@ mask manipulation steps in CASA.
 
 import os
 import glob
+import math
 import logging
 
 import numpy as np
 import scipy.ndimage as ndimage
 from scipy.special import erfc
 
+try:
+    import numba
+    has_numba = True
+except ImportError:
+    has_numba = False
+
 try:
     import pyfits  # CASA has pyfits, not astropy
 except ImportError:
@@ -40,6 +47,116 @@ logger.setLevel(logging.DEBUG)
 
 # region Noise estimation
 
+if has_numba:
+    # Parallel kernels for the noise statistics. The numpy versions
+    # below are used when numba is not available.
+
+    @numba.njit(parallel=True, cache=True)
+    def _sum_sumsq(data):
+        """
+        Sum and sum of squares of data, accumulated in float64.
+        """
+        sum_data = 0.0
+        sum_sq = 0.0
+        for ii in numba.prange(data.size):
+            val = np.float64(data[ii])
+            sum_data += val
+            sum_sq += val * val
+        return sum_data, sum_sq
+
+    @numba.njit(parallel=True, cache=True)
+    def _select_kth(data, center, use_abs, kk, nbins):
+        """
+        Exact kk-th smallest value of data (or of |data - center| if
+        use_abs). Each thread histograms its own slab, the histograms
+        are combined to find the bin holding the kk-th value, and only
+        the values in that bin are sorted.
+        """
+        n_chunk = numba.get_num_threads()
+        step = (data.size + n_chunk - 1) // n_chunk
+
+        chunk_lo = np.full(n_chunk, np.inf)
+        chunk_hi = np.full(n_chunk, -np.inf)
+        for cc in numba.prange(n_chunk):
+            for ii in range(cc * step, min((cc + 1) * step, data.size)):
+                val = np.float64(data[ii])
+                if use_abs:
+                    val = abs(val - center)
+                if val < chunk_lo[cc]:
+                    chunk_lo[cc] = val
+                if val > chunk_hi[cc]:
+                    chunk_hi[cc] = val
+        lo = chunk_lo.min()
+        hi = chunk_hi.max()
+        if hi <= lo:
+            return lo
+        scale = nbins / (hi - lo)
+
+        hist = np.zeros((n_chunk, nbins), dtype=np.int64)
+        for cc in numba.prange(n_chunk):
+            for ii in range(cc * step, min((cc + 1) * step, data.size)):
+                val = np.float64(data[ii])
+                if use_abs:
+                    val = abs(val - center)
+                this_bin = min(int((val - lo) * scale), nbins - 1)
+                hist[cc, this_bin] += 1
+        counts = hist.sum(axis=0)
+
+        target_bin = 0
+        n_below = 0
+        while n_below + counts[target_bin] <= kk:
+            n_below += counts[target_bin]
+            target_bin += 1
+
+        in_bin = np.empty(counts[target_bin], dtype=np.float64)
+        n_in_bin = 0
+        for ii in range(data.size):
+            val = np.float64(data[ii])
+            if use_abs:
+                val = abs(val - center)
+            if min(int((val - lo) * scale), nbins - 1) == target_bin:
+                in_bin[n_in_bin] = val
+                n_in_bin += 1
+        in_bin.sort()
+        return in_bin[kk - n_below]
+
+    @numba.njit(cache=True)
+    def _median_parallel(data, center, use_abs):
+        """
+        Median of data (or of |data - center|) via _select_kth,
+        averaging the two middle values for even sizes like np.median.
+        """
+        half = data.size // 2
+        upper = _select_kth(data, center, use_abs, half, 4096)
+        if data.size % 2 == 1:
+            return upper
+        lower = _select_kth(data, center, use_abs, half - 1, 4096)
+        return 0.5 * (lower + upper)
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _chauv_keep(data, mean, inv_std_sqrt2, crit, keep):
+        """
+        Fused Chauvenet test: fill keep with erfc(|x-mean|/(std
+        sqrt(2))) > crit in a single pass over data.
+        """
+        for ii in numba.prange(data.size):
+            keep[ii] = math.erfc(abs(data[ii] - mean) * inv_std_sqrt2) > crit
+
+
+def _median_in_place(buf):
+    """
+    Median of a flat array using np.partition. Reorders buf in place,
+    so only pass a scratch copy. Matches np.median for even sizes by
+    averaging the two middle elements.
+    """
+    half = buf.size // 2
+    if buf.size % 2 == 1:
+        buf.partition(half)
+        return (buf[half])
+    buf.partition([half - 1, half])
+    return (0.5 * (buf[half - 1] + buf[half]))
+
+
 def mad(
         data=None,
         as_sigma=True
@@ -62,9 +179,29 @@ def mad(
     if data is None:
         logger.error("No data supplied.")
 
-    this_med = np.median(data)
-    this_dev = np.abs(data - this_med)
-    this_mad = np.median(this_dev)
+    data = np.asarray(data)
+    # The selection paths below assume finite values (NaN would index
+    # outside the numba histogram), so anything else keeps the
+    # np.median behavior, e.g., NaN in gives NaN out.
+    if (data.size <= 1e5) or (not np.isfinite(data).all()):
+        this_med = np.median(data)
+        this_dev = np.abs(data - this_med)
+        this_mad = np.median(this_dev)
+    elif has_numba:
+        # numba only accepts native byte order, while memory-mapped
+        # FITS data are big-endian.
+        flat_data = np.ascontiguousarray(
+            data.ravel(), dtype=data.dtype.newbyteorder('='))
+        this_med = _median_parallel(flat_data, 0.0, False)
+        this_mad = _median_parallel(flat_data, this_med, True)
+    else:
+        # For large arrays select the middle element(s) with a partial
+        # sort and reuse a single scratch buffer for the deviations.
+        buf = np.array(data, dtype=np.float32).ravel()
+        this_med = _median_in_place(buf)
+        np.subtract(data.ravel(), this_med, out=buf)
+        np.fabs(buf, out=buf)
+        this_mad = _median_in_place(buf)
     if as_sigma:
         return (this_mad / 0.6745)
     else:
@@ -116,19 +253,29 @@ def estimate_noise(
         logger.error("Invalid method - " + method + " valid methods are " + str(valid_methods))
         return (None)
 
-    if mask is None:
-        use_mask = np.isfinite(data)
-    else:
-        use_mask = mask * np.isfinite(data)
+    use_mask = np.isfinite(data)
+    if mask is not None:
+        np.logical_and(use_mask, np.asarray(mask, dtype=bool), out=use_mask)
 
-    if np.sum(use_mask) == 0:
+    n_valid = np.count_nonzero(use_mask)
+    if n_valid == 0:
         logger.error("No valid data. Returning NaN.")
         return (np.nan)
 
-    use_data = data[use_mask]
+    # Only copy the data out when something is actually masked.
+    if n_valid == use_mask.size:
+        use_data = np.ravel(data)
+    else:
+        use_data = data[use_mask]
+    del use_mask
+
+    # Work in single precision (the native precision of CASA images)
+    # to halve the memory traffic. Reductions still accumulate in
+    # double precision.
+    use_data = np.ascontiguousarray(use_data, dtype=np.float32)
 
     if method == 'std':
-        this_noise = np.std(use_data)
+        this_noise = np.std(use_data, dtype=np.float64)
         return (this_noise)
 
     if method == 'mad':
@@ -136,37 +283,179 @@ def estimate_noise(
         return (this_noise)
 
     if method == 'chauvstd' or method == 'chauvmad':
+        # Keep running sums (in float64 to avoid cancellation) so that
+        # the mean and standard deviation only need the rejected
+        # points each iteration, not a full pass over the data.
+        if has_numba:
+            sum_data, sum_sq = _sum_sumsq(use_data)
+        else:
+            sum_data = np.sum(use_data, dtype=np.float64)
+            sum_sq = np.dot(use_data.astype(np.float64), use_data)
+        n_data = use_data.size
+
+        # Buffers for the rejection test, allocated once and sliced
+        # down as the data shrink.
+        keep_buf = np.empty(n_data, dtype=np.bool_)
+        if not has_numba:
+            scratch = np.empty(n_data, dtype=np.float32)
+        # The surviving data alternate between two buffers, allocated
+        # on first use. use_data may be a view of the caller's array, so
+        # it is never compacted in place.
+        data_bufs = [None, None]
+        this_buf = 0
+
+        inv_sqrt2 = 1.0 / np.sqrt(2.0)
+        chauv_crit = 1.0 / (2.0 * n_data)
+
         for ii in range(niter):
-            this_mean = np.mean(use_data)
+            this_mean = sum_data / n_data
             if method == 'chauvstd':
-                this_std = np.std(use_data)
+                this_std = np.sqrt(max(sum_sq / n_data - this_mean ** 2, 0.0))
             elif method == 'chauvmad':
                 this_std = mad(use_data, as_sigma=True)
 
-            this_dev = np.abs((use_data - this_mean) / this_std) / 2.0 ** 0.5
-            this_prob = erfc(this_dev)
-
-            chauv_crit = 1.0 / (2.0 * len(use_data))
-            keep = this_prob > chauv_crit
-            if np.sum(keep) == 0:
+            inv_std_sqrt2 = float(inv_sqrt2 / this_std)
+            keep = keep_buf[:n_data]
+            if has_numba:
+                _chauv_keep(use_data, this_mean, inv_std_sqrt2, chauv_crit, keep)
+            else:
+                this_prob = scratch[:n_data]
+                np.subtract(use_data, float(this_mean), out=this_prob)
+                np.abs(this_prob, out=this_prob)
+                this_prob *= inv_std_sqrt2
+                erfc(this_prob, out=this_prob)
+                np.greater(this_prob, chauv_crit, out=keep)
+            n_keep = int(np.count_nonzero(keep))
+            if n_keep == 0:
                 logger.error("Rejected all data. Returning NaN.")
                 return (np.nan)
-            use_data = use_data[keep]
-        this_noise = np.std(use_data)
+            if n_keep < n_data:
+                rejected = use_data[~keep].astype(np.float64)
+                sum_data -= np.sum(rejected)
+                sum_sq -= np.dot(rejected, rejected)
+                n_data = n_keep
+                chauv_crit = 1.0 / (2.0 * n_data)
+                if data_bufs[this_buf] is None:
+                    data_bufs[this_buf] = np.empty(n_keep, dtype=use_data.dtype)
+                np.compress(keep, use_data, out=data_bufs[this_buf][:n_keep])
+                use_data = data_bufs[this_buf][:n_keep]
+                this_buf = 1 - this_buf
+
+        this_mean = sum_data / n_data
+        this_noise = np.sqrt(max(sum_sq / n_data - this_mean ** 2, 0.0))
         return (this_noise)
 
     return (None)
 
 
+def _casa_image_planes(infile, maskfile=None):
+    """
+    Generator over the planes of a CASA image (and optional mask
+    image on the same grid) along the outermost non-degenerate axis,
+    normally the spectral axis. Yields (data, pixel_mask, user_mask,
+    user_mask_mask) with the last two None if there is no maskfile. 2D
+    images are returned as a single chunk.
+    """
+    myia = au.createCasaTool(casaStuff.iatool)
+    myia.open(infile)
+    shape = [int(x) for x in myia.shape()]
+
+    mask_ia = None
+    if maskfile is not None:
+        mask_ia = au.createCasaTool(casaStuff.iatool)
+        mask_ia.open(maskfile)
+
+    loop_axis = len(shape) - 1
+    while loop_axis > 0 and shape[loop_axis] == 1:
+        loop_axis -= 1
+    if loop_axis < 2:
+        loop_axis = len(shape) - 1
+        n_planes = 1
+    else:
+        n_planes = shape[loop_axis]
+
+    try:
+        for this_plane in range(n_planes):
+            blc = [0] * len(shape)
+            trc = [x - 1 for x in shape]
+            if n_planes > 1:
+                blc[loop_axis] = this_plane
+                trc[loop_axis] = this_plane
+
+            data = myia.getchunk(blc=blc, trc=trc)
+            mask = myia.getchunk(blc=blc, trc=trc, getmask=True)
+            user_mask = None
+            user_mask_mask = None
+            if mask_ia is not None:
+                user_mask = mask_ia.getchunk(blc=blc, trc=trc)
+                user_mask_mask = mask_ia.getchunk(blc=blc, trc=trc, getmask=True)
+
+            yield (data, mask, user_mask, user_mask_mask)
+    finally:
+        myia.close()
+        if mask_ia is not None:
+            mask_ia.close()
+
+
+def _fits_image_planes(infile, maskfile=None):
+    """
+    Generator with the same output as _casa_image_planes but reading
+    FITS files through a memory map, so only the plane being worked on
+    is ever read from disk. Pixel masks are taken to be all True
+    (blanks are NaN in FITS and are caught by the finite check).
+    """
+    hdul = pyfits.open(infile, memmap=True)
+    mask_hdul = None
+    if maskfile is not None:
+        mask_hdul = pyfits.open(maskfile, memmap=True)
+
+    try:
+        data = hdul[0].data
+        user_mask = None
+        if mask_hdul is not None:
+            user_mask = mask_hdul[0].data
+
+        if data.ndim >= 3:
+            # Collapse the leading (python order) axes into one plane index.
+            plane_shape = data.shape[-2:]
+            data = data.reshape((-1,) + plane_shape)
+            if user_mask is not None:
+                user_mask = user_mask.reshape((-1,) + plane_shape)
+        else:
+            data = data[np.newaxis]
+            if user_mask is not None:
+                user_mask = user_mask[np.newaxis]
+
+        for this_plane in range(data.shape[0]):
+            this_data = np.asarray(data[this_plane])
+            this_mask = np.ones(this_data.shape, dtype=bool)
+            this_user_mask = None
+            this_user_mask_mask = None
+            if user_mask is not None:
+                this_user_mask = np.asarray(user_mask[this_plane])
+                this_user_mask_mask = np.isfinite(this_user_mask)
+            yield (this_data, this_mask, this_user_mask, this_user_mask_mask)
+    finally:
+        hdul.close()
+        if mask_hdul is not None:
+            mask_hdul.close()
+
+
 def noise_for_cube(
         infile=None,
         maskfile=None,
         exclude_mask=True,
         method='mad',
         niter=None,
+        backend='auto',
 ):
     """
     Get a single noise estimate for an image cube.
+
+    backend (default "auto") : "casa" to read a CASA image with the
+    image tool, "fits" to read a FITS file through a memory map, or
+    "auto" to pick "fits" when infile is a .fits file and "casa"
+    otherwise. Any maskfile needs to be in the same format as infile.
     """
 
     if infile is None:
@@ -182,24 +471,60 @@ def noise_for_cube(
             logger.error('maskfile specified but not found - ' + maskfile)
             return (None)
 
-    myia = au.createCasaTool(casaStuff.iatool)
-    myia.open(infile)
-    data = myia.getchunk()
-    mask = myia.getchunk(getmask=True)
-    myia.close()
+    valid_backends = ['auto', 'casa', 'fits']
+    if backend not in valid_backends:
+        logger.error("Invalid backend - " + backend + " valid backends are " + str(valid_backends))
+        return (None)
 
-    if maskfile is not None:
-        myia.open(maskfile)
-        user_mask = myia.getchunk()
-        user_mask_mask = myia.getchunk(getmask=True)
-        myia.close()
-        if exclude_mask:
-            mask = mask * user_mask_mask * (user_mask < 0.5)
+    if backend == 'auto':
+        if os.path.isfile(infile) and infile.lower().endswith('.fits'):
+            backend = 'fits'
         else:
-            mask = mask * user_mask_mask * (user_mask >= 0.5)
+            backend = 'casa'
 
-    this_noise = estimate_noise(
-        data=data, mask=mask, method=method, niter=niter)
+    if backend == 'fits':
+        planes = _fits_image_planes(infile, maskfile=maskfile)
+    else:
+        planes = _casa_image_planes(infile, maskfile=maskfile)
+
+    # Work one plane at a time and only keep the valid samples, so
+    # that the full cube and its masks are never resident at once.
+    samples = None
+    n_samples = 0
+    for data, mask, user_mask, user_mask_mask in planes:
+        use_mask = np.isfinite(data)
+        np.logical_and(use_mask, mask, out=use_mask)
+        if user_mask is not None:
+            np.logical_and(use_mask, user_mask_mask, out=use_mask)
+            if exclude_mask:
+                np.logical_and(use_mask, user_mask < 0.5, out=use_mask)
+            else:
+                np.logical_and(use_mask, user_mask >= 0.5, out=use_mask)
+
+        n_valid = int(np.count_nonzero(use_mask))
+        if n_valid == 0:
+            continue
+        if samples is None:
+            # Native byte order, as FITS planes come in big-endian.
+            samples = np.empty(n_valid, dtype=data.dtype.newbyteorder('='))
+        if n_samples + n_valid > samples.size:
+            # Grow geometrically so the number of copies stays small.
+            new_size = max(2 * samples.size, n_samples + n_valid)
+            samples = np.resize(samples, new_size)
+        samples[n_samples:n_samples + n_valid] = data[use_mask]
+        n_samples += n_valid
+
+    if samples is None:
+        logger.error("No valid data. Returning NaN.")
+        return (np.nan)
+
+    if method == 'mad':
+        # The samples are already finite and masked, so the common
+        # case can skip the validation and masking in estimate_noise.
+        this_noise = mad(samples[:n_samples], as_sigma=True)
+    else:
+        this_noise = estimate_noise(
+            data=samples[:n_samples], mask=None, method=method, niter=niter)
 
     return (this_noise)
 
@@ -253,9 +578,19 @@ def write_mask(infile, outfile, mask, huge_cube_workaround=True):
     """
 
     os.system('rm -rf ' + outfile)
-    os.system('cp -r ' + infile + ' ' + outfile)
+
+    # Make an empty image on the same grid instead of copying infile,
+    # whose pixel data would only be overwritten.
+    myia = au.createCasaTool(casaStuff.iatool)
+    myia.open(infile)
+    mycs = myia.coordsys()
+    shape = myia.shape()
+    myia.close()
+    myia.fromshape(outfile=outfile, shape=shape, csys=mycs.torecord(), overwrite=True)
+    mycs.done()
 
     if huge_cube_workaround:
+        myia.close()
         casaStuff.exportfits(imagename=outfile,
                              fitsimage=outfile + '.fits',
                              stokeslast=False, overwrite=True)
@@ -279,13 +614,73 @@ def write_mask(infile, outfile, mask, huge_cube_workaround=True):
         # Remove the intermediate fits file
         os.system('rm -rf ' + outfile + '.fits')
     else:
-        myia.open(outfile)
         myia.putchunk(mask)
         myia.close()
 
     return True
 
 
+def _robust_stats_and_axes(infile):
+    """
+    Robust statistics and axis names of an image from a single image
+    tool open, rather than going through imstat and imhead.
+    """
+    myia = au.createCasaTool(casaStuff.iatool)
+    myia.open(infile)
+    stats = myia.statistics(robust=True, verbose=False)
+    mycs = myia.coordsys()
+    axis_names = mycs.names()
+    mycs.done()
+    myia.close()
+    return (stats, axis_names)
+
+
+def _neighbor_or(mask, axis, block_bytes=2 ** 18):
+    """
+    Return mask OR'ed with its immediate neighbours along axis. Works
+    on shifted slice views so that, unlike np.roll, no extra copies of
+    the cube are made and the edges do not wrap around.
+
+    The spectral axis is usually the slowest varying one, so the cube
+    is processed in spatial tiles spanning all channels, sized so that
+    each tile is roughly block_bytes. This keeps the strided reads
+    along the spectral axis in cache.
+    """
+    out = mask.astype(bool, copy=True)
+    src = np.moveaxis(mask, axis, -1)
+    dst = np.moveaxis(out, axis, -1)
+
+    if src.ndim < 3:
+        tiles = [(Ellipsis,)]
+    else:
+        plane_bytes = int(np.prod(src.shape[2:]))
+        tile = max(8, int(np.sqrt(block_bytes / max(plane_bytes, 1))))
+        tiles = [(slice(i0, i0 + tile), slice(j0, j0 + tile))
+                 for i0 in range(0, src.shape[0], tile)
+                 for j0 in range(0, src.shape[1], tile)]
+
+    for this_tile in tiles:
+        src_block = src[this_tile]
+        dst_block = dst[this_tile]
+        np.logical_or(dst_block[..., 1:], src_block[..., :-1], out=dst_block[..., 1:])
+        np.logical_or(dst_block[..., :-1], src_block[..., 1:], out=dst_block[..., :-1])
+    return (out)
+
+
+def _grow_mask(hi_mask, low_mask):
+    """
+    Equivalent to binary_dilation(hi_mask, mask=low_mask,
+    iterations=-1): keep every connected region of the low mask that
+    contains at least one high mask pixel. Labeling does this in a
+    single pass instead of dilating to convergence.
+    """
+    labels, n_labels = ndimage.label(low_mask)
+    keep_label = np.zeros(n_labels + 1, dtype=bool)
+    keep_label[labels[hi_mask]] = True
+    keep_label[0] = False
+    return (keep_label[labels])
+
+
 def signal_mask(
         imaging_method='tclean',
         cube_root=None,
@@ -313,46 +708,48 @@ def signal_mask(
         return
 
     if os.path.isdir(cube_root + '.residual' + suffix_in):
-        stats = stat_cube(cube_root + '.residual' + suffix_in)
+        stat_file = cube_root + '.residual' + suffix_in
     else:
-        stats = stat_cube(cube_root + '.image' + suffix_in)
+        stat_file = cube_root + '.image' + suffix_in
+
+    # CASA tools and tasks are not thread safe, so the statistics and
+    # the read of the cube run one after the other.
+    stats, axis_names = _robust_stats_and_axes(stat_file)
+
+    logger.info('Reading cube.')
+    cube = read_cube(cube_root + '.image' + suffix_in, huge_cube_workaround=True)
+
     rms = stats['medabsdevmed'][0] / 0.6745
     hi_thresh = high_snr * rms
     low_thresh = low_snr * rms
 
-    header = casaStuff.imhead(cube_root + '.image' + suffix_in)
-    if header['axisnames'][2] == 'Frequency':
+    if axis_names[2] == 'Frequency':
         spec_axis = 2
     else:
         spec_axis = 3
 
-    logger.info('Reading cube.')
-    cube = read_cube(cube_root + '.image' + suffix_in, huge_cube_workaround=True)
+    # Threshold into preallocated boolean cubes. In absolute mode the
+    # absolute value is taken once, in place, since the cube itself is
+    # not needed after thresholding.
+    if absolute:
+        np.abs(cube, out=cube)
 
     logger.info('Building high mask.')
-    if absolute:
-        hi_mask = (np.abs(cube) > hi_thresh)
-    else:
-        hi_mask = (cube > hi_thresh)
+    hi_mask = np.empty(cube.shape, dtype=np.bool_)
+    np.greater(cube, hi_thresh, out=hi_mask)
 
     if high_snr > low_snr:
         logger.info('Expanding mask.')
         logger.info('Building low mask.')
-        if absolute:
-            low_mask = (np.abs(cube) > low_thresh)
-        else:
-            low_mask = (cube > low_thresh)
+        low_mask = np.empty(cube.shape, dtype=np.bool_)
+        np.greater(cube, low_thresh, out=low_mask)
         if do_roll:
             logger.info('... rolling.')
-            rolled_low_mask = \
-                (low_mask + np.roll(low_mask, 1, axis=spec_axis) + \
-                 np.roll(low_mask, -1, axis=spec_axis)) >= 1
+            rolled_low_mask = _neighbor_or(low_mask, spec_axis)
             low_mask = rolled_low_mask
 
         logger.info('... joining low mask with high mask via dilation.')
-        mask = ndimage.binary_dilation(hi_mask,
-                                       mask=low_mask,
-                                       iterations=-1)
+        mask = _grow_mask(hi_mask, low_mask)
         del low_mask
         del hi_mask
         if do_roll:
@@ -361,9 +758,7 @@ def signal_mask(
         logger.info('No expansion requested.')
         if do_roll:
             logger.info('... rolling.')
-            mask = \
-                (hi_mask + np.roll(hi_mask, 1, axis=spec_axis) + \
-                 np.roll(hi_mask, -1, axis=spec_axis)) >= 1
+            mask = _neighbor_or(hi_mask, spec_axis)
             del hi_mask
         else:
             mask = hi_mask
@@ -381,9 +776,9 @@ def signal_mask(
 
     logger.info('Joining with old mask.')
     if operation == 'AND':
-        mask = mask * old_mask
+        np.logical_and(mask, old_mask.astype(bool, copy=False), out=mask)
     if operation == 'OR':
-        mask = (mask + old_mask) > 0
+        np.logical_or(mask, old_mask.astype(bool, copy=False), out=mask)
     if operation == 'NEW':
         mask = mask
     else:
@@ -424,9 +819,9 @@ def apply_additional_mask(
     myia.open(old_mask_file)
     mask = myia.getchunk()
     if operation == "AND":
-        mask *= (new_mask > new_thresh)
+        np.logical_and(mask, new_mask > new_thresh, out=mask)
     else:
-        mask = (mask + (new_mask > new_thresh)) >= 1.0
+        np.logical_or(mask, new_mask > new_thresh, out=mask)
     myia.putchunk(mask)
     myia.close()
 
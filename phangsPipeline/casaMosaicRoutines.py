@@ -6,14 +6,27 @@ in CASA.
 #region Imports and definitions
 
 import os
+import copy
 import glob
+import hashlib
+import shutil
 import logging
+from collections import namedtuple
 
 import numpy as np
+
+# os.scandir is new in Python 3.5. Under Python 2 (CASA 5 and earlier)
+# fall back to os.listdir plus a stat per entry.
 try:
-    import pyfits  # CASA has pyfits, not astropy
+    from os import scandir as _scandir
 except ImportError:
-    import astropy.io.fits as pyfits
+    _scandir = None
+
+try:
+    import numba
+    has_numba = True
+except ImportError:
+    has_numba = False
 
 # Analysis utilities
 import analysisUtils as au
@@ -24,12 +37,131 @@ from .pipelineVersion import version as pipeVer
 # CASA stuff
 from . import casaStuff
 
-# Other pipeline stuff
-from . import casaMaskingRoutines as cma
+# casaMaskingRoutines (and the scipy/numba stack behind it) is only
+# needed to estimate noise for weights, so it is imported on first use
+# in generate_weight_file.
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Angle conversions
+DEG2RAD = np.pi/180.0
+RAD2DEG = 180.0/np.pi
+RAD2AS = RAD2DEG*3600.0
+
+# Accepted input_type values for generate_weight_file
+_VALID_WEIGHT_INPUT_TYPES = frozenset(('pb', 'noise', 'weight'))
+
+# Mosaic center and extent returned by calculate_mosaic_extent. Centers
+# are in degrees, RA/Dec extents in arcseconds, frequencies in Hz (see
+# the *_units fields).
+MosaicExtent = namedtuple(
+    'MosaicExtent',
+    'ra_ctr dec_ctr delta_ra delta_dec freq_ctr delta_freq '
+    'ra_units dec_units dra_units ddec_units freq_units dfreq_units')
+
+# Header cache shared by the routines below, keyed on (kind, path,
+# header file stamp) so that edited images are re-read.
+_HEADER_CACHE = {}
+
+def _header_stamp(path):
+    """
+    (mtime, size, inode) of the file holding the header of an
+    image: table.dat for a CASA image, the file itself otherwise. A
+    single stat, so a cache hit stays much cheaper than imhead. The
+    stamp changes when the keywords are edited or the image is
+    replaced, but not when only the pixel data change.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, 'table.dat')
+    this_stat = os.stat(path)
+    return((this_stat.st_mtime, this_stat.st_size, this_stat.st_ino))
+
+def _image_mtime(path):
+    """
+    Latest modification time of a CASA image directory or any of the
+    files directly inside it, so that changes to the pixel data (which
+    do not touch the directory itself) are seen too.
+    """
+    latest = os.path.getmtime(path)
+    if not os.path.isdir(path):
+        return(latest)
+    if _scandir is None:
+        for this_name in os.listdir(path):
+            this_file = os.path.join(path, this_name)
+            if os.path.isfile(this_file):
+                latest = max(latest, os.path.getmtime(this_file))
+        return(latest)
+    for entry in _scandir(path):
+        if entry.is_file():
+            latest = max(latest, entry.stat().st_mtime)
+    return(latest)
+
+def _list_subdirs(parent):
+    """
+    Names of the directories directly inside parent, from a single
+    listing when os.scandir is available.
+    """
+    if _scandir is None:
+        return(set(this_name for this_name in os.listdir(parent)
+                   if os.path.isdir(os.path.join(parent, this_name))))
+    return(set(entry.name for entry in _scandir(parent) if entry.is_dir()))
+
+def _missing_dirs(file_list):
+    """
+    Return the entries of file_list that are not existing directories
+    (CASA images), in their original order. Lists each parent
+    directory once with os.scandir rather than stat'ing every file,
+    which is much cheaper on networked file systems.
+    """
+    present = {}
+    missing = []
+    for this_file in file_list:
+        this_path = os.path.normpath(this_file)
+        parent = os.path.dirname(this_path) or '.'
+        if parent not in present:
+            try:
+                present[parent] = _list_subdirs(parent)
+            except OSError:
+                present[parent] = set()
+        if os.path.basename(this_path) not in present[parent]:
+            missing.append(this_file)
+    return(missing)
+
+def _cached_header(path, kind='imhead', writable=False):
+    """
+    Return the header of an image, reading it only once per version of
+    its header file. kind is 'imhead' for casaStuff.imhead or 'regrid'
+    for the imregrid(template='get') record.
+
+    The cached record itself is returned and must not be modified.
+    Callers that edit the header pass writable=True to get a copy.
+    """
+    key = (kind, os.path.abspath(path), _header_stamp(path))
+    if key not in _HEADER_CACHE:
+        if kind == 'regrid':
+            _HEADER_CACHE[key] = casaStuff.imregrid(path, template='get')
+        else:
+            _HEADER_CACHE[key] = casaStuff.imhead(path)
+    if writable:
+        return(copy.deepcopy(_HEADER_CACHE[key]))
+    return(_HEADER_CACHE[key])
+
+# Record of the images written by common_grid_for_mosaic, keyed on the
+# output path. Each entry holds the input version and target grid that
+# produced the output plus the output's own modification time, so an
+# identical regrid (e.g. the same tiles revisited for another product
+# or configuration in one session) can be skipped.
+_REGRID_CACHE = {}
+
+def _grid_signature(target_hdr, asvelocity, interpolation, axes):
+    """
+    Hash of a target header and the imregrid options applied with it.
+    """
+    sig = repr((sorted(target_hdr.items()), asvelocity, interpolation,
+                list(axes)))
+    return(hashlib.sha1(sig.encode('utf-8')).hexdigest())
+
 #endregion
 
 #region Routines to match resolution
@@ -40,7 +172,8 @@ def common_res_for_mosaic(
     target_res=None,
     pixel_padding=2.0,
     do_convolve=True,
-    overwrite=False
+    overwrite=False,
+    nproc=1,
     ):
     """
     Convolve multi-part cubes to a common res for mosaicking.
@@ -64,6 +197,13 @@ def common_res_for_mosaic(
     overwrite (default False) : Delete existing files. You probably
     want to set this to True but it's a user decision.
 
+    nproc (default 1) : number of processes used to convolve the
+    files in parallel. The default convolves serially in this
+    process. None uses one per file up to the number of CPUs. Only
+    raise this where CASA can safely be forked and the caller is not
+    itself running in a process pool. Needs concurrent.futures
+    (Python 3), otherwise the files are convolved serially.
+
     Unless a target resolution is supplied, the routine first
     calculates the common resolution based on the beam size of all of
     the input files. This target resolution is returned as the output
@@ -85,10 +225,10 @@ def common_res_for_mosaic(
         logger.error("Missing required infile_list.")
         return(None)
 
-    for this_file in infile_list:
-        if os.path.isdir(this_file) == False:
-            logger.error("File not found "+this_file)
-            return(None)
+    missing_files = _missing_dirs(infile_list)
+    if len(missing_files) > 0:
+        logger.error("File not found "+missing_files[0])
+        return(None)
 
     # If do_convolve is True then make sure that we have output files
     # and that they match the input files.
@@ -99,63 +239,55 @@ def common_res_for_mosaic(
             logger.error("Missing outfile_list required for convolution.")
             return(None)
 
-        if (type(outfile_list) != type([])) and (type(outfile_list) != type({})):
+        if not isinstance(outfile_list, (list, dict)):
             logger.error("outfile_list must be dictionary or list.")
             return(None)
 
-        if type(outfile_list) == type([]):
+        if isinstance(outfile_list, list):
             if len(infile_list) != len(outfile_list):
                 logger.error("Mismatch in input and output list lengths.")
                 return(None)
-            outfile_dict = {}
-            for ii in range(len(infile_list)):
-                outfile_dict[infile_list[ii]] = outfile_list[ii]
-
-        if type(outfile_list) == type({}):
+            outfile_dict = dict(zip(infile_list, outfile_list))
+        else:
             outfile_dict = outfile_list
 
         missing_keys = 0
         for infile in infile_list:
-            if infile not in outfile_dict.keys():
+            if infile not in outfile_dict:
                 logger.error("Missing output file for infile: "+infile)
                 missing_keys += 1
-            if missing_keys > 0:
-                logger.error("Missing "+str(missing_keys)+" output file names.")
-                return(None)
+        if missing_keys > 0:
+            logger.error("Missing "+str(missing_keys)+" output file names.")
+            return(None)
 
     # Figure out the target resolution if it is not supplied by the user
 
     if target_res is None:
         logger.debug("Calculating target resolution ... ")
 
-        bmaj_list = []
-        pix_list = []
+        bmaj_array = np.empty(len(infile_list))
+        pix_array = np.empty(len(infile_list))
 
-        for this_infile in infile_list:
+        for ii, this_infile in enumerate(infile_list):
             logger.info("Checking "+this_infile)
 
-            hdr = casaStuff.imhead(this_infile)
+            hdr = _cached_header(this_infile)
 
             if (hdr['axisunits'][0] != 'rad'):
                 logger.error("ERROR: Based on CASA experience. I expected units of radians.")
                 logger.error("I did not find this. Returning. Adjust code or investigate file "+this_infile)
                 return(None)
-            this_pixel = abs(hdr['incr'][0]/np.pi*180.0*3600.)
+            pix_array[ii] = abs(hdr['incr'][0])*RAD2AS
 
             if (hdr['restoringbeam']['major']['unit'] != 'arcsec'):
                 logger.error("ERROR: Based on CASA experience. I expected units of arcseconds for the beam.")
                 logger.error("I did not find this. Returning. Adjust code or investigate file "+this_infile)
                 return(None)
-            this_bmaj = hdr['restoringbeam']['major']['value']
+            bmaj_array[ii] = hdr['restoringbeam']['major']['value']
 
-            bmaj_list.append(this_bmaj)
-            pix_list.append(this_pixel)
-
-        max_bmaj = np.max(bmaj_list)
-        max_pix = np.max(pix_list)
-        target_bmaj = np.sqrt((max_bmaj)**2+(pixel_padding*max_pix)**2)
+        target_bmaj = np.sqrt((bmaj_array.max())**2+(pixel_padding*pix_array.max())**2)
     else:
-        target_bmaj = force_beam
+        target_bmaj = target_res
 
     logger.info('I found a common beam size of '+str(target_bmaj))
 
@@ -164,21 +296,78 @@ def common_res_for_mosaic(
 
     # With a target resolution and matched lists we can proceed.
 
-    for this_infile in infile_list:
-        this_outfile = outfile_dict[this_infile]
-        logger.debug("Convolving "+this_infile+' to '+this_outfile)
-
-        casaStuff.imsmooth(imagename=this_infile,
-                      outfile=this_outfile,
-                      targetres=True,
-                      major=str(target_bmaj)+'arcsec',
-                      minor=str(target_bmaj)+'arcsec',
-                      pa='0.0deg',
-                      overwrite=overwrite
-                      )
+    # The convolutions are independent, so run them in separate
+    # processes (CASA tool state is per process).
+
+    smooth_tasks = [(this_infile, outfile_dict[this_infile], target_bmaj, overwrite)
+                    for this_infile in infile_list]
+
+    if nproc is None:
+        import multiprocessing
+        nproc = min(len(smooth_tasks), multiprocessing.cpu_count())
+
+    # Indices of the tasks that finished in the pool, so that a serial
+    # fallback only picks up the rest.
+    done = set()
+
+    if nproc > 1:
+        # concurrent.futures is not available under Python 2 (CASA 5
+        # and earlier), so only import it when a pool is requested.
+        try:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            from concurrent.futures.process import BrokenProcessPool
+        except ImportError:
+            logger.warning("concurrent.futures not available. Convolving serially.")
+            nproc = 1
+
+    if nproc > 1:
+        try:
+            executor = ProcessPoolExecutor(max_workers=nproc)
+        except (OSError, NotImplementedError) as exc:
+            logger.warning("Could not start a process pool ("+str(exc)+"). Convolving serially.")
+            executor = None
+
+        if executor is not None:
+            with executor:
+                future_dict = {}
+                try:
+                    for ii, this_task in enumerate(smooth_tasks):
+                        future_dict[executor.submit(_smooth_to_round_beam, this_task)] = ii
+                except (OSError, BrokenProcessPool) as exc:
+                    logger.warning("Process pool failed to start workers ("+str(exc)+"). Convolving the rest serially.")
+                for this_future in as_completed(future_dict):
+                    try:
+                        this_future.result()
+                    except BrokenProcessPool as exc:
+                        logger.warning("Process pool failed ("+str(exc)+"). Will convolve "+smooth_tasks[future_dict[this_future]][0]+" serially.")
+                        continue
+                    done.add(future_dict[this_future])
+
+    for ii, this_task in enumerate(smooth_tasks):
+        if ii in done:
+            continue
+        _smooth_to_round_beam(this_task)
 
     return(target_bmaj)
 
+def _smooth_to_round_beam(task):
+    """
+    Convolve one image to a round beam. Takes a single (infile,
+    outfile, target_bmaj in arcsec, overwrite) tuple so that it can be
+    mapped over a process pool.
+    """
+    this_infile, this_outfile, target_bmaj, overwrite = task
+    logger.debug("Convolving "+this_infile+' to '+this_outfile)
+
+    casaStuff.imsmooth(imagename=this_infile,
+                  outfile=this_outfile,
+                  targetres=True,
+                  major=str(target_bmaj)+'arcsec',
+                  minor=str(target_bmaj)+'arcsec',
+                  pa='0.0deg',
+                  overwrite=overwrite
+                  )
+
 #endregion
 
 #region Routines to match astrometry between parts of a mosaic
@@ -192,7 +381,7 @@ def calculate_mosaic_extent(
     """
     Given a list of input files, calculate the center and extent of
     the mosaic needed to cover them all. Return the results as a
-    dictionary.
+    MosaicExtent named tuple.
 
     infile_list : list of input files to loop over.
 
@@ -213,26 +402,29 @@ def calculate_mosaic_extent(
         logger.error("Missing required infile_list.")
         return(None)
 
-    for this_infile in infile_list:
-        if not os.path.isdir(this_infile):
-            logger.error("File not found "+this_infile+"Returning.")
-            return(None)
+    missing_files = _missing_dirs(infile_list)
+    if len(missing_files) > 0:
+        logger.error("File not found "+missing_files[0]+"Returning.")
+        return(None)
 
-    # Initialize the list of corner RA and Dec positions.
+    # Initialize the arrays of corner RA and Dec positions, eight
+    # corners (four spatial corners at the first and last channel) per
+    # file.
 
-    ra_list = []
-    dec_list = []
+    n_corner = 8
+    ra_corners = np.empty((len(infile_list), n_corner))
+    dec_corners = np.empty((len(infile_list), n_corner))
     # TBD - right now we assume matched frequency/velocity axis
-    freq_list = []
+    freq_corners = np.empty((len(infile_list), n_corner))
 
     # Loop over input files and calculate RA and Dec coordinates of
     # the corners.
 
     myia = au.createCasaTool(casaStuff.iatool)
 
-    for this_infile in infile_list:
+    for ii, this_infile in enumerate(infile_list):
 
-        this_hdr = casaStuff.imhead(this_infile)
+        this_hdr = _cached_header(this_infile)
 
         if this_hdr['axisnames'][0] != 'Right Ascension':
             logger.error("Expected axis 0 to be Right Ascension. Returning.")
@@ -253,32 +445,32 @@ def calculate_mosaic_extent(
         ylo = 0
         yhi = this_shape[1]-1
 
-        pixbox = str(xlo)+','+str(ylo)+','+str(xlo)+','+str(ylo)
-        blc = casaStuff.imval(this_infile, stokes='I', box=pixbox)
-
-        pixbox = str(xlo)+','+str(yhi)+','+str(xlo)+','+str(yhi)
-        tlc = casaStuff.imval(this_infile, stokes='I', box=pixbox)
-
-        pixbox = str(xhi)+','+str(yhi)+','+str(xhi)+','+str(yhi)
-        trc = casaStuff.imval(this_infile, stokes='I', box=pixbox)
+        # Convert the four corners at the first and last channel to
+        # world coordinates in one call to the coordinate system tool,
+        # rather than calling imval once per corner.
 
-        pixbox = str(xhi)+','+str(ylo)+','+str(xhi)+','+str(ylo)
-        brc = casaStuff.imval(this_infile, stokes='I', box=pixbox)
-
-        ra_list.append(blc['coords'][:,0])
-        ra_list.append(tlc['coords'][:,0])
-        ra_list.append(trc['coords'][:,0])
-        ra_list.append(brc['coords'][:,0])
-
-        dec_list.append(blc['coords'][:, 1])
-        dec_list.append(tlc['coords'][:, 1])
-        dec_list.append(trc['coords'][:, 1])
-        dec_list.append(brc['coords'][:, 1])
+        if 'Frequency' in this_hdr['axisnames']:
+            spec_axis = list(this_hdr['axisnames']).index('Frequency')
+        else:
+            logger.error("Expected a Frequency axis. Returning.")
+            return(None)
+        chan_lo = 0
+        chan_hi = this_shape[spec_axis]-1
+
+        corner_pix = np.zeros((len(this_shape), n_corner))
+        corner_pix[0,:] = [xlo, xlo, xhi, xhi, xlo, xlo, xhi, xhi]
+        corner_pix[1,:] = [ylo, yhi, yhi, ylo, ylo, yhi, yhi, ylo]
+        corner_pix[spec_axis,:] = [chan_lo]*4 + [chan_hi]*4
+
+        myia.open(this_infile)
+        mycs = myia.coordsys()
+        corner_world = mycs.toworldmany(corner_pix)['numeric']
+        mycs.done()
+        myia.close()
 
-        freq_list.append(blc['coords'][:, 2])
-        freq_list.append(tlc['coords'][:, 2])
-        freq_list.append(trc['coords'][:, 2])
-        freq_list.append(brc['coords'][:, 2])
+        ra_corners[ii,:] = corner_world[0,:]
+        dec_corners[ii,:] = corner_world[1,:]
+        freq_corners[ii,:] = corner_world[spec_axis,:]
 
     # Get the minimum and maximum RA and Declination.
 
@@ -287,15 +479,15 @@ def calculate_mosaic_extent(
     # this. Meridian seems more likely to come up, so just that is
     # probably fine.
 
-    min_ra = np.min(np.concatenate(ra_list))
-    max_ra = np.max(np.concatenate(ra_list))
-    min_dec = np.min(np.concatenate(dec_list))
-    max_dec = np.max(np.concatenate(dec_list))
+    min_ra = ra_corners.min()
+    max_ra = ra_corners.max()
+    min_dec = dec_corners.min()
+    max_dec = dec_corners.max()
 
     # TBD - right now we assume matched frequency/velocity axis
 
-    min_freq = np.min(np.concatenate(freq_list))
-    max_freq = np.max(np.concatenate(freq_list))
+    min_freq = freq_corners.min()
+    max_freq = freq_corners.max()
 
     # If we do not force the center of the mosaic, then take it to be
     # the average of the min and max, so that the image will be a
@@ -304,12 +496,12 @@ def calculate_mosaic_extent(
     if force_ra_ctr == None:
         ra_ctr = (max_ra+min_ra)*0.5
     else:
-        ra_ctr = force_ra_ctr*np.pi/180.
+        ra_ctr = force_ra_ctr*DEG2RAD
 
     if force_dec_ctr == None:
         dec_ctr = (max_dec+min_dec)*0.5
     else:
-        dec_ctr = force_dec_ctr*np.pi/180.
+        dec_ctr = force_dec_ctr*DEG2RAD
 
 
     if force_freq_ctr == None:
@@ -327,16 +519,22 @@ def calculate_mosaic_extent(
     delta_freq = 2.0*np.max([np.abs(max_freq-freq_ctr),
                              np.abs(min_freq-freq_ctr)])
 
-    # Put the output into a dictionary.
-
-    output = {
-        'ra_ctr':[ra_ctr*180./np.pi,'degrees'],
-        'dec_ctr':[dec_ctr*180./np.pi,'degrees'],
-        'delta_ra':[delta_ra*180./np.pi*3600.,'arcsec'],
-        'delta_dec':[delta_dec*180./np.pi*3600.,'arcsec'],
-        'freq_ctr':[freq_ctr,'Hz'],
-        'delta_freq':[delta_freq,'Hz'],
-    }
+    # Put the output into a named tuple.
+
+    output = MosaicExtent(
+        ra_ctr=float(ra_ctr*RAD2DEG),
+        dec_ctr=float(dec_ctr*RAD2DEG),
+        delta_ra=float(delta_ra*RAD2AS),
+        delta_dec=float(delta_dec*RAD2AS),
+        freq_ctr=float(freq_ctr),
+        delta_freq=float(delta_freq),
+        ra_units='degrees',
+        dec_units='degrees',
+        dra_units='arcsec',
+        ddec_units='arcsec',
+        freq_units='Hz',
+        dfreq_units='Hz',
+    )
     return(output)
 
 def build_common_header(
@@ -395,10 +593,10 @@ def build_common_header(
         logger.info("Using first input file as template - "+template_file)
 
     if infile_list is not None:
-        for this_infile in infile_list:
-            if not os.path.isdir(this_infile):
-                logger.error("File not found "+this_infile+" . Returning.")
-                return(None)
+        missing_files = _missing_dirs(infile_list)
+        if len(missing_files) > 0:
+            logger.error("File not found "+missing_files[0]+" . Returning.")
+            return(None)
 
     if template_file is not None:
         if os.path.isdir(template_file) == False:
@@ -430,23 +628,23 @@ def build_common_header(
             )
 
         if ra_ctr is None:
-            ra_ctr = extent_dict['ra_ctr'][0]
+            ra_ctr = extent_dict.ra_ctr
         if dec_ctr is None:
-            dec_ctr = extent_dict['dec_ctr'][0]
+            dec_ctr = extent_dict.dec_ctr
         if delta_ra is None:
-            delta_ra = extent_dict['delta_ra'][0]
+            delta_ra = extent_dict.delta_ra
         if delta_dec is None:
-            delta_dec = extent_dict['delta_dec'][0]
+            delta_dec = extent_dict.delta_dec
 
         # Just assume Doppler
         if freq_ctr is None:
-            freq_ctr = extent_dict['freq_ctr'][0]
+            freq_ctr = extent_dict.freq_ctr
         if delta_freq is None:
-            delta_freq = extent_dict['delta_freq'][0]
+            delta_freq = extent_dict.delta_freq
 
     # Get the header from the template file
 
-    target_hdr = casaStuff.imregrid(template_file, template='get')
+    target_hdr = _cached_header(template_file, kind='regrid', writable=True)
 
     # Get the pixel scale. This makes some assumptions. We could put a
     # lot of general logic here, but we are usually working in a
@@ -461,8 +659,8 @@ def build_common_header(
     # Add our target center pixel values to the header after
     # converting to radians.
 
-    ra_ctr_in_rad = ra_ctr * np.pi / 180.
-    dec_ctr_in_rad = dec_ctr * np.pi / 180.
+    ra_ctr_in_rad = ra_ctr * DEG2RAD
+    dec_ctr_in_rad = dec_ctr * DEG2RAD
 
     target_hdr['csys']['direction0']['crval'][0] = ra_ctr_in_rad
     target_hdr['csys']['direction0']['crval'][1] = dec_ctr_in_rad
@@ -471,13 +669,11 @@ def build_common_header(
     # Calculate the size of the image in pixels and set the central
     # pixel coordinate for the RA and Dec axis.
 
-    ra_pix_in_as = np.abs(target_hdr['csys']['direction0']['cdelt'][0]*180./np.pi*3600.)
-    ra_axis_size = np.ceil(delta_ra / ra_pix_in_as) + 1
-    new_ra_ctr_pix = (ra_axis_size + 1) /2.0
-
-    dec_pix_in_as = np.abs(target_hdr['csys']['direction0']['cdelt'][1]*180./np.pi*3600.)
-    dec_axis_size = np.ceil(delta_dec / dec_pix_in_as) + 1
-    new_dec_ctr_pix = (dec_axis_size + 1)/2.0
+    pix_in_as = np.abs(np.array(target_hdr['csys']['direction0']['cdelt'][:2]))*RAD2AS
+    ra_axis_size, dec_axis_size = \
+        np.ceil(np.array([delta_ra, delta_dec]) / pix_in_as) + 1
+    new_ra_ctr_pix, new_dec_ctr_pix = \
+        (np.array([ra_axis_size, dec_axis_size]) + 1) / 2.0
 
     freq_pix_in_hz = np.abs(target_hdr['csys']['spectral1']['wcs']['cdelt'])
     freq_axis_size = np.ceil(delta_freq / freq_pix_in_hz) + 1
@@ -558,10 +754,8 @@ def common_grid_for_mosaic(
         logger.error("Infile list missing.")
         return(None)
 
-    for this_infile in infile_list:
-        if os.path.isdir(this_infile) == False:
-            logger.error("File "+this_infile+" not found. Continuing.")
-            continue
+    for this_infile in _missing_dirs(infile_list):
+        logger.error("File "+this_infile+" not found. Continuing.")
 
     if outfile_list is None:
         logger.error("Outfile list missing.")
@@ -569,19 +763,16 @@ def common_grid_for_mosaic(
 
     # Make sure that the outfile list is a dictionary
 
-    if (type(outfile_list) != type([])) and (type(outfile_list) != type({})):
+    if not isinstance(outfile_list, (list, dict)):
         logger.error("outfile_list must be dictionary or list.")
         return(None)
 
-    if type(outfile_list) == type([]):
+    if isinstance(outfile_list, list):
         if len(infile_list) != len(outfile_list):
             logger.error("Mismatch in input and output list lengths.")
             return(None)
-        outfile_dict = {}
-        for ii in range(len(infile_list)):
-            outfile_dict[infile_list[ii]] = outfile_list[ii]
-
-    if type(outfile_list) == type({}):
+        outfile_dict = dict(zip(infile_list, outfile_list))
+    else:
         outfile_dict = outfile_list
 
     # Get the common header if one is not supplied
@@ -610,10 +801,23 @@ def common_grid_for_mosaic(
 
     logger.info('Aligning image files.')
 
+    grid_sig = _grid_signature(target_hdr, asvelocity, interpolation, axes)
+
     for this_infile in infile_list:
 
         this_outfile = outfile_dict[this_infile]
 
+        if not os.path.isdir(this_infile):
+            continue
+
+        in_key = (os.path.abspath(this_infile), _image_mtime(this_infile))
+        out_key = os.path.abspath(this_outfile)
+        cached = _REGRID_CACHE.get(out_key)
+        if cached is not None and os.path.isdir(this_outfile) and \
+                cached == (in_key, grid_sig, _image_mtime(this_outfile)):
+            logger.info('Already aligned to this grid: '+this_outfile)
+            continue
+
         casaStuff.imregrid(imagename=this_infile,
                       template=target_hdr,
                       output=this_outfile,
@@ -621,12 +825,77 @@ def common_grid_for_mosaic(
                       axes=axes,
                       interpolation=interpolation,
                       overwrite=overwrite)
+
+        if os.path.isdir(this_outfile):
+            _REGRID_CACHE[out_key] = (
+                in_key, grid_sig, _image_mtime(this_outfile))
+        else:
+            _REGRID_CACHE.pop(out_key, None)
+
     return(target_hdr)
 
 #endregion
 
 #region Routines to deal with weighting
 
+# Codes for the pixel transforms used to build weight images.
+_WEIGHT_FROM_NOISE = 0
+_WEIGHT_FROM_PB = 1
+_WEIGHT_FROM_WEIGHT = 2
+_WEIGHT_FROM_VALUE = 3
+
+if has_numba:
+    @numba.njit(parallel=True, cache=True)
+    def _weight_kernel(data, mode, scale):
+        """
+        Turn a flat array into weights in place, in a single pass:
+        scale/x^2 (noise), scale*x^2 (pb), scale*x (weight) or
+        x*0+scale (value, which keeps NaNs blanked).
+        """
+        for ii in numba.prange(data.size):
+            val = data[ii]
+            if mode == 0:
+                data[ii] = scale / (val * val)
+            elif mode == 1:
+                data[ii] = scale * val * val
+            elif mode == 2:
+                data[ii] = scale * val
+            else:
+                data[ii] = val * 0.0 + scale
+
+def _flat_order(data):
+    """
+    Memory order ('C' or 'F') in which data can be flattened without a
+    copy. CASA hands back Fortran-ordered chunks.
+    """
+    if data.flags.f_contiguous and not data.flags.c_contiguous:
+        return('F')
+    return('C')
+
+def _weight_transform(data, mode, scale):
+    """
+    Apply one of the _WEIGHT_FROM_* transforms to data, in place, and
+    return it. Uses a fused numba kernel when available.
+    """
+    if has_numba:
+        order = _flat_order(data)
+        flat_data = np.ravel(data, order=order)
+        _weight_kernel(flat_data, mode, scale)
+        return(flat_data.reshape(data.shape, order=order))
+
+    if mode == _WEIGHT_FROM_NOISE:
+        np.multiply(data, data, out=data)
+        np.divide(scale, data, out=data)
+    elif mode == _WEIGHT_FROM_PB:
+        np.multiply(data, data, out=data)
+        data *= scale
+    elif mode == _WEIGHT_FROM_WEIGHT:
+        data *= scale
+    else:
+        data *= 0.0
+        data += scale
+    return(data)
+
 def generate_weight_file(
     image_file = None,
     input_file = None,
@@ -703,11 +972,9 @@ def generate_weight_file(
         logger.error("Specify output file.")
         return(None)
 
-    if input_file is not None:
-        valid_types = ['pb', 'noise', 'weight']
-        if input_type not in valid_types:
-            logger.error("Valid input types are :"+str(valid_types))
-            return(None)
+    if input_type not in _VALID_WEIGHT_INPUT_TYPES:
+        logger.error("Valid input types are :"+str(sorted(_VALID_WEIGHT_INPUT_TYPES)))
+        return(None)
 
     if input_file is None and input_value is None:
         logger.error("Need either an input value or an input file.")
@@ -738,6 +1005,8 @@ def generate_weight_file(
 
             # Could use kwargs here to simplify parameter passing. Fine right now, too.
 
+            from . import casaMaskingRoutines as cma
+
             noise_value = cma.noise_for_cube(
                 infile = image_file,
                 maskfile = mask_for_noise,
@@ -763,52 +1032,70 @@ def generate_weight_file(
         if not overwrite:
             logger.error("File exists and overwrite set to false - "+outfile)
             return(None)
-        os.system('rm -rf '+outfile)
+        if os.path.isdir(outfile):
+            shutil.rmtree(outfile)
+        else:
+            os.remove(outfile)
 
-    # Copy the template and read the data into memory
+    # Copy the template (once, without spawning a shell) and read the
+    # data into memory
 
-    os.system("cp -r "+template+" "+outfile)
+    shutil.copytree(template, outfile)
 
     myia = au.createCasaTool(casaStuff.iatool)
     myia.open(outfile)
     data = myia.getchunk()
 
+    # Keep the weights in single precision. getchunk can hand back
+    # doubles, which doubles the memory traffic here and downstream;
+    # float32 is ample for a weight (the science data are untouched).
+
+    data = data.astype(np.float32, copy=False)
+
+    # Fold the optional scalings into a single factor so that the
+    # weight image is built in one pass over the data.
+
+    scale = 1.0
+
+    # If request, scale the data by a factor.
+
+    if scale_by_factor is not None:
+
+        scale *= scale_by_factor
+
+    # If request, scale the data by the inverse square of the noise estimate.
+
+    if scale_by_noise:
+
+        scale *= 1./noise_value**2
+
     # Case 1 : We just have an input value.
 
     if input_file is None and input_value is not None:
 
-        if input_type is 'noise':
+        if input_type == 'noise':
             weight_value = 1./input_value**2
-        if input_type is 'pb':
+        elif input_type == 'pb':
             weight_value = input_value**2
-        if input_type is 'weight':
+        elif input_type == 'weight':
             weight_value = input_value
 
-        weight_image = data*0.0 + weight_value
+        weight_image = _weight_transform(
+            data, _WEIGHT_FROM_VALUE, np.float32(weight_value*scale))
 
-    # Case 2 : We have an input image. Read in the data and manipulate
-    # it into a weight array.
+    # Case 2 : We have an input image. Manipulate it into a weight
+    # array.
 
     if input_file is not None:
 
-        if input_type is 'noise':
-            weight_image = 1./data**2
-        if input_type is 'pb':
-            weight_image = data**2
-        if input_type is 'weight':
-            weight_image = data
+        if input_type == 'noise':
+            mode = _WEIGHT_FROM_NOISE
+        elif input_type == 'pb':
+            mode = _WEIGHT_FROM_PB
+        elif input_type == 'weight':
+            mode = _WEIGHT_FROM_WEIGHT
 
-    # Now we have a weight image. If request, scale the data by a factor.
-
-    if scale_by_factor is not None:
-
-        weight_image = weight_image * scale_by_factor
-
-    # If request, scale the data by the inverse square of the noise estimate.
-
-    if scale_by_noise:
-
-        weight_image = weight_image * 1./noise_value**2
+        weight_image = _weight_transform(data, mode, np.float32(scale))
 
     # Put the data back into the file and close it.
     myia.putchunk(weight_image)
@@ -820,16 +1107,37 @@ def generate_weight_file(
 
 #region Routines to carry out the mosaicking
 
+if has_numba:
+    @numba.njit(parallel=True, cache=True)
+    def _accumulate_weighted(sum_data, sum_weight, data, weight):
+        """
+        Add data*weight to sum_data and weight to sum_weight in a
+        single pass. All arrays are flat and the same length.
+        """
+        for ii in numba.prange(data.size):
+            sum_data[ii] += data[ii] * weight[ii]
+            sum_weight[ii] += weight[ii]
+else:
+    def _accumulate_weighted(sum_data, sum_weight, data, weight):
+        """
+        Add data*weight to sum_data and weight to sum_weight in place.
+        """
+        sum_weight += weight
+        np.multiply(data, weight, out=data)
+        sum_data += data
+
 def mosaic_aligned_data(
     infile_list = None,
     weightfile_list = None,
     outfile = None,
     overwrite=False,
+    write_sum_and_weight=True,
     ):
     """
     Combine a list of previously aligned data into a single image
     using linear mosaicking. Weight each file using a corresponding
-    weight file and also create sum and integrated weight files.
+    weight file and optionally also create sum and integrated weight
+    files.
 
     infile_list : list of input files. Required.
 
@@ -841,11 +1149,15 @@ def mosaic_aligned_data(
 
     outfile : the name of the output mosaic image. Will create
     associated files with ".sum" and ".weight" appended to this file
-    name.
+    name if write_sum_and_weight is True.
 
     overwrite (default False) : Delete existing files. You probably
     want to set this to True but it's a user decision.
 
+    write_sum_and_weight (default True) : also write the weighted sum
+    and the summed weight images. The mosaic itself does not need
+    them, so set this to False to save the I/O.
+
     """
 
     # Check inputs
@@ -862,10 +1174,8 @@ def mosaic_aligned_data(
 
     sum_file = outfile+'.sum'
     weight_file = outfile+'.weight'
-    mask_file = outfile+'.mask'
-    temp_file = outfile+'.temp'
 
-    for this_file in [outfile, sum_file, weight_file, temp_file, mask_file]:
+    for this_file in [outfile, sum_file, weight_file]:
         if os.path.isdir(this_file):
             if not overwrite:
                 logger.error("Output file present and overwrite off - "+this_file)
@@ -878,139 +1188,144 @@ def mosaic_aligned_data(
         logger.error("Missing weightfile_list required for mosaicking.")
         return(None)
 
-    if (type(weightfile_list) != type([])) and (type(weightfile_list) != type({})):
+    if not isinstance(weightfile_list, (list, dict)):
         logger.error("Weightfile_list must be dictionary or list.")
         return(None)
 
-    if type(weightfile_list) == type([]):
+    if isinstance(weightfile_list, list):
         if len(infile_list) != len(weightfile_list):
             logger.error("Mismatch in input and output list lengths.")
             return(None)
-        weightfile_dict = {}
-        for ii in range(len(infile_list)):
-            weightfile_dict[infile_list[ii]] = weightfile_list[ii]
-
-    if type(weightfile_list) == type({}):
+        weightfile_dict = dict(zip(infile_list, weightfile_list))
+    else:
         weightfile_dict = weightfile_list
 
     # Check file existence
 
-    for this_infile in infile_list:
-        if not os.path.isdir(this_infile):
-            logger.error("Missing file - " + this_infile)
-            return(None)
-        this_weightfile = weightfile_dict[this_infile]
-        if not os.path.isdir(this_weightfile):
-            logger.error("Missing file - " + this_weightfile)
-            return(None)
-
-    # Define LEL expressions to be fed to immath. These just sum up
-    # weight*image and weight. Those produce the .sum and .weight
-    # output file.
-
-    full_imlist = []
-
-    lel_exp_sum = ''
-    lel_exp_weight = ''
-
-    first = True
-    counter = 0
-
-    for this_infile in infile_list:
-
-        # Build out to a list that goes infile1, infile2, ... infilen,
-        # weightfile1, weightfile2, ... weightfilen.
-
-        full_imlist.append(this_infile)
-        full_imlist.append(weightfile_dict[this_infile])
-
-        # Make LEL string expressions that refer to these two images
-        # and then increment the counter by 2. So IM0 is the first
-        # image, IM1 the first weight, IM2 the second image, IM3 the
-        # second weight, and so on.
-
-        this_im = 'IM'+str(counter)
-        this_wt = 'IM'+str(counter+1)
-        counter += 2
-
-        # LEL expressions that refer to the weighted sum and the
-        # weight for this image pair.
-
-        this_lel_sum = '('+this_im+'*'+this_wt+')'
-        this_lel_weight = '('+this_wt+')'
-
-        # Chain these together into a full string that adds all of the
-        # images together.
-
-        if first:
-            lel_exp_sum += this_lel_sum
-            lel_exp_weight += this_lel_weight
-            first=False
-        else:
-            lel_exp_sum += '+'+this_lel_sum
-            lel_exp_weight += '+'+this_lel_weight
-
-    # Feed our two LEL strings into immath to make the sum and weight
-    # images.
-
-    myia = au.createCasaTool(casaStuff.iatool)
-    for thisfile in full_imlist:
-        myia.open(thisfile)
-        if not np.all(myia.getchunk(getmask=True)):
-            myia.replacemaskedpixels(0.0)
-            myia.set(pixelmask=1)
-        myia.close()
-
-    cwd = os.getcwd()
-    ppdir = os.chdir(os.path.dirname(full_imlist[0]))
-    local_imlist = [os.path.basename(ll) for ll in full_imlist]
-    sum_file = os.path.basename(sum_file)
-    weight_file = os.path.basename(weight_file)
-    temp_file = os.path.basename(temp_file)
-    local_outfile = os.path.basename(outfile)
-    local_maskfile = os.path.basename(mask_file)
-
-    casaStuff.immath(imagename = local_imlist, mode='evalexpr',
-                     expr=lel_exp_sum, outfile=sum_file,
-                     imagemd = local_imlist[0])
+    missing_files = _missing_dirs(
+        [x for this_infile in infile_list
+         for x in (this_infile, weightfile_dict[this_infile])])
+    if len(missing_files) > 0:
+        logger.error("Missing file - " + missing_files[0])
+        return(None)
 
-    casaStuff.immath(imagename = local_imlist, mode='evalexpr',
-                     expr=lel_exp_weight, outfile=weight_file,
-                     imagemd = local_imlist[0])
+    # Set up the output images as copies of the first input, which
+    # supplies the metadata (as imagemd did for immath). The mosaic is
+    # written straight into the output file with degenerate axes
+    # dropped, so no intermediate quotient or mask images are needed.
+    # All outputs are filled block by block below. As before, the
+    # products are written next to the first input file.
 
-    # Just to be safe, reset the masks on the two images.
+    out_dir = os.path.dirname(infile_list[0])
+    outfile = os.path.join(out_dir, os.path.basename(outfile))
+    sum_file = os.path.join(out_dir, os.path.basename(sum_file))
+    weight_file = os.path.join(out_dir, os.path.basename(weight_file))
 
     myia = au.createCasaTool(casaStuff.iatool)
-    myia.open(sum_file)
-    myia.set(pixelmask=1)
-    myia.close()
-
-    myia.open(weight_file)
-    myia.set(pixelmask=1)
+    myrg = au.createCasaTool(casaStuff.rgtool)
+    myia.open(infile_list[0])
+    shape = [int(x) for x in myia.shape()]
+    mycs = myia.coordsys()
+    axis_types = list(mycs.axiscoordinatetypes())
+    mycs.done()
+    out_image = myia.subimage(outfile=outfile, dropdeg=True)
+    aux_images = {}
+    if write_sum_and_weight:
+        for this_file in [sum_file, weight_file]:
+            aux_images[this_file] = myia.subimage(outfile=this_file)
     myia.close()
 
-    # Now divide the sum*weight image by the weight image.
-
-    casaStuff.immath(imagename = [sum_file, weight_file], mode='evalexpr',
-                expr='iif(IM1 > 0.0, IM0/IM1, 0.0)', outfile=temp_file,
-                imagemd = sum_file)
+    # Axes kept in the output after dropping degenerate ones.
+    keep_axes = [ii for ii in range(len(shape)) if shape[ii] > 1]
 
-    # The mask for the final output is where we have any weight. This
-    # may not be exactly what's desired in all cases, but it's not
-    # clear to me what else to do except for some weight threshold
-    # (does not have to be zero, though, I guess).
+    # Accumulate weight*image and weight over the input pairs. Work
+    # through the cube in blocks of channels of roughly block_bytes
+    # each so that only one block of each image is in memory at a
+    # time. Masked pixels count as zero.
 
-    casaStuff.immath(imagename = weight_file, mode='evalexpr',
-                     expr='iif(IM0 > 0.0, 1.0, 0.0)',
-                     outfile=local_maskfile)
+    if 'Spectral' in axis_types:
+        spec_axis = axis_types.index('Spectral')
+    else:
+        spec_axis = len(shape)-1
+    nchan = shape[spec_axis]
+    block_bytes = 2**26
+    plane_bytes = 4*int(np.prod(shape))//nchan
+    chan_per_block = max(1, block_bytes//plane_bytes)
 
-    # Strip out any degenerate axes and create the final output file.
+    in_images = []
+    for this_infile in infile_list:
+        data_ia = au.createCasaTool(casaStuff.iatool)
+        data_ia.open(this_infile)
+        weight_ia = au.createCasaTool(casaStuff.iatool)
+        weight_ia.open(weightfile_dict[this_infile])
+        in_images.append((data_ia, weight_ia))
+
+    for chan_lo in range(0, nchan, chan_per_block):
+
+        blc = [0]*len(shape)
+        trc = [x-1 for x in shape]
+        blc[spec_axis] = chan_lo
+        trc[spec_axis] = min(chan_lo+chan_per_block, nchan)-1
+
+        sum_data = None
+        for data_ia, weight_ia in in_images:
+
+            this_data = data_ia.getchunk(blc=blc, trc=trc)
+            this_data[~data_ia.getchunk(blc=blc, trc=trc, getmask=True)] = 0.0
+
+            this_weight = weight_ia.getchunk(blc=blc, trc=trc)
+            this_weight[~weight_ia.getchunk(blc=blc, trc=trc, getmask=True)] = 0.0
+
+            if sum_data is None:
+                block_shape = this_data.shape
+                order = _flat_order(this_data)
+                sum_data = np.zeros(this_data.size, dtype=this_data.dtype)
+                sum_weight = np.zeros(this_data.size, dtype=this_data.dtype)
+
+            _accumulate_weighted(sum_data, sum_weight,
+                                 np.ravel(this_data, order=order),
+                                 np.ravel(this_weight, order=order))
+            del this_data, this_weight
+
+        # Divide the sum*weight image by the weight image. The mask
+        # for the final output is where we have any weight. This may
+        # not be exactly what's desired in all cases, but it's not
+        # clear to me what else to do except for some weight threshold
+        # (does not have to be zero, though, I guess).
+
+        has_weight = sum_weight > 0.0
+        mosaic_data = np.zeros_like(sum_data)
+        np.divide(sum_data, sum_weight, out=mosaic_data, where=has_weight)
+
+        out_shape = [block_shape[ii] for ii in keep_axes]
+        out_box = myrg.box([blc[ii] for ii in keep_axes],
+                           [trc[ii] for ii in keep_axes])
+        out_image.putregion(
+            pixels=mosaic_data.reshape(out_shape, order=order),
+            pixelmask=has_weight.reshape(out_shape, order=order),
+            region=out_box)
+
+        for this_file, this_block in [(sum_file, sum_data),
+                                      (weight_file, sum_weight)]:
+            if this_file in aux_images:
+                aux_images[this_file].putchunk(
+                    this_block.reshape(block_shape, order=order), blc=blc)
+
+        del sum_data, sum_weight, mosaic_data, has_weight
+
+    for data_ia, weight_ia in in_images:
+        data_ia.close()
+        weight_ia.close()
+
+    out_image.done()
+    myrg.done()
+
+    # Just to be safe, reset the masks on the sum and weight images.
+
+    for this_image in aux_images.values():
+        this_image.set(pixelmask=1)
+        this_image.done()
 
-    casaStuff.imsubimage(imagename=temp_file,
-                    outfile=local_outfile,
-                    mask='"'+local_maskfile+'"',
-                    dropdeg=True)
-    os.chdir(cwd)
     return(None)
 
 #endregion
@@ -4,22 +4,20 @@ import numpy as np
 import astropy.units as u
 import astropy.utils.console as console
 import copy
+import itertools
+import logging
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
-def ftconvolve(ImageIn, major = 1.0, minor = 1.0,
-               angle = 0.0):
-    NanMaskFlag = False
-    nanmask = np.isnan(ImageIn)
-    image = np.copy(ImageIn)
-    if np.any(nanmask):
-        wtimg = np.ones_like(ImageIn)
-        NanMaskFlag = True
-        image[nanmask] = 0.0
-        wtimg[nanmask] = 0.0
-        ftwtimg = np.fft.fftn(wtimg)
-
-    ftimg = np.fft.fftn(image)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
 
+def _ft_kernel(shape, major, minor, angle):
+    """
+    Fourier transform of the Gaussian convolution kernel for an image
+    of the given shape.
+    """
     if major == 0.0:
         sigmau = np.inf
     else:
@@ -38,11 +36,28 @@ def ftconvolve(ImageIn, major = 1.0, minor = 1.0,
                np.cos(FTPA)**2 / sigmav**2)
     b = 0.25 * np.sin(2 * FTPA) * (1.0 / sigmav**2 - 1.0 / sigmau**2)
 
-    vv, uu = np.meshgrid(np.fft.fftfreq(ftimg.shape[0]),
-                         np.fft.fftfreq(ftimg.shape[1]),
+    vv, uu = np.meshgrid(np.fft.fftfreq(shape[0]),
+                         np.fft.fftfreq(shape[1]),
                          indexing='ij')
 
     FTkernel = np.exp(-a*(uu)**2 -c*(vv)**2 +2*b*(uu*vv))
+    return(FTkernel)
+
+def ftconvolve(ImageIn, major = 1.0, minor = 1.0,
+               angle = 0.0):
+    NanMaskFlag = False
+    nanmask = np.isnan(ImageIn)
+    image = np.copy(ImageIn)
+    if np.any(nanmask):
+        wtimg = np.ones_like(ImageIn)
+        NanMaskFlag = True
+        image[nanmask] = 0.0
+        wtimg[nanmask] = 0.0
+        ftwtimg = np.fft.fftn(wtimg)
+
+    ftimg = np.fft.fftn(image)
+
+    FTkernel = _ft_kernel(ftimg.shape, major, minor, angle)
     ConvolvedImage = (np.fft.ifftn(ftimg * FTkernel)).real
 
     if NanMaskFlag:
@@ -51,9 +66,24 @@ def ftconvolve(ImageIn, major = 1.0, minor = 1.0,
         ConvolvedImage[nanmask] = np.nan
     return(ConvolvedImage)
 
+def _convolve_plane(plane, this_beam, target_beam, pixsize, fwhm2sigma):
+    """
+    Convolve one plane from this_beam to target_beam with ftconvolve.
+    """
+    conv_beam = target_beam - this_beam
+
+    majpix = conv_beam.major.value / pixsize / fwhm2sigma
+    minpix = conv_beam.minor.value / pixsize / fwhm2sigma
+
+    return(ftconvolve(plane,
+                      major = majpix,
+                      minor = minpix,
+                      angle = conv_beam.pa.value))
+
 def MakeRoundBeam(incube,
                   outfile=None,
-                  overwrite=True):
+                  overwrite=True,
+                  max_workers=None):
 
     '''
     This takes a FITS file or a SpectralCube and outputs
@@ -63,6 +93,11 @@ def MakeRoundBeam(incube,
     filename : `string` or `SpectralCube`
        Input spectral cube
 
+    max_workers : `int`
+       Number of threads used to convolve the channels, which are
+       independent (numpy's FFT releases the GIL). Defaults to the
+       number of CPUs.
+
     Returns
     -------
     cube : `SpectralCube`
@@ -84,7 +119,7 @@ def MakeRoundBeam(incube,
     target_beam = Beam(major=target_beamsize*u.deg,
                        minor=target_beamsize*u.deg,
                        pa=0.0*u.deg)
-    print("Target beam is : {}".format(target_beam))
+    logger.info("Target beam is : {}".format(target_beam))
 
     # Let's assume square pixels
     pixsize = cube.wcs.pixel_scale_matrix[1,1]
@@ -92,20 +127,19 @@ def MakeRoundBeam(incube,
 
     output = np.zeros(cube.shape)
 
-    with console.ProgressBar(cube.shape[0]) as bar:
-
-        for ii, plane in enumerate(cube.filled_data[:]):
-            this_beam = beams[ii]
-            conv_beam = target_beam - this_beam
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
 
-            majpix = conv_beam.major.value / pixsize / fwhm2sigma
-            minpix = conv_beam.minor.value / pixsize / fwhm2sigma
+    with console.ProgressBar(cube.shape[0]) as bar, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
 
-            output[ii,:,:] = ftconvolve(plane,
-                                        major = majpix,
-                                        minor = minpix,
-                                        angle = conv_beam.pa.value)
+        planes = executor.map(
+            _convolve_plane, cube.filled_data[:], beams,
+            itertools.repeat(target_beam), itertools.repeat(pixsize),
+            itertools.repeat(fwhm2sigma))
 
+        for ii, this_plane in enumerate(planes):
+            output[ii,:,:] = this_plane
             bar.update()
 
     hdr = copy.copy(cube.header)
@@ -59,6 +59,10 @@ import numpy as np
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Accepted values for the imaging_method and recipe arguments
+_IMAGING_METHODS = frozenset(('tclean', 'sdintimaging'))
+_KNOWN_RECIPES = frozenset(('phangsalma',))
+
 # Check casa environment by importing CASA-only packages
 from .casa_check import is_casa_installed
 casa_enabled = is_casa_installed()
@@ -223,7 +227,7 @@ if casa_enabled:
                 do_revert_to_singlescale = True
                 do_export_to_fits = True
 
-            if imaging_method not in ['tclean', 'sdintimaging']:
+            if imaging_method not in _IMAGING_METHODS:
                 logger.error('imaging_method should be either tclean or sdintimaging')
                 raise Exception('imaging_method should be either tclean or sdintimaging')
 
@@ -235,8 +239,7 @@ if casa_enabled:
                 logger.error("Need a products list.")
                 return (None)
 
-            known_recipes = ['phangsalma']
-            if recipe not in known_recipes:
+            if recipe not in _KNOWN_RECIPES:
                 logger.error("Recipe not known " + recipe)
                 return (None)
 
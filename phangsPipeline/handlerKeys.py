@@ -56,6 +56,9 @@ class KeyHandler:
         self._dir_for_target = None
         self._override_dict = None
 
+        # Memoized per-target lookups, see _cached_lookup
+        self._lookup_cache = {}
+
         self.build_key_handler(master_key)
 
     ##############################################################
@@ -79,6 +82,7 @@ class KeyHandler:
             return False
 
         self._master_key = os.path.abspath(master_key)
+        self.clear_lookup_cache()
         self._read_master_key()
 
         logger.info("")
@@ -153,6 +157,42 @@ class KeyHandler:
         logger.info("&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&")
         logger.info("")
     
+    def clear_lookup_cache(self):
+        """
+        Forget the memoized per-target lookups. Called whenever the
+        keys are (re)read.
+        """
+        self._lookup_cache = {}
+        return None
+
+    def _cached_lookup(self, name, key, func):
+        """
+        Return func() memoized on (name, key). The handlers ask for
+        the same directories, mosaic parts, etc. for every product and
+        config of a target, so only the first call does the work. None
+        (the error return) is not cached so that errors keep being
+        reported.
+        """
+        cache_key = (name, key)
+        if cache_key in self._lookup_cache:
+            return self._lookup_cache[cache_key]
+        result = func()
+        if result is not None:
+            self._lookup_cache[cache_key] = result
+        return result
+
+    def _selection_key(self, *args):
+        """
+        Turn only/skip/first/last style selection arguments (None, a
+        string, or a list of strings) into a hashable cache key. A
+        string stays a string, since select_from_list treats it
+        differently from a list holding that string.
+        """
+        return tuple(
+            this_arg if (this_arg is None or isinstance(this_arg, str)) else
+            tuple(this_arg)
+            for this_arg in args)
+
     def _parse_path(self, input_path):
         """
         Parse relative path.
@@ -1277,42 +1317,66 @@ class KeyHandler:
         Return the imaging working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, imaging=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, imaging=True)
+        return self._cached_lookup(
+            'imaging_dir', target,
+            lambda: self._get_dir_for_target(target=target, imaging=True))
 
     def get_postprocess_dir_for_target(self, target=None, changeto=False):
         """
         Return the postprocessing working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, postprocess=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, postprocess=True)
+        return self._cached_lookup(
+            'postprocess_dir', target,
+            lambda: self._get_dir_for_target(target=target, postprocess=True))
 
     def get_derived_dir_for_target(self, target=None, changeto=False):
         """
         Return the derived working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, derived=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, derived=True)
+        return self._cached_lookup(
+            'derived_dir', target,
+            lambda: self._get_dir_for_target(target=target, derived=True))
 
     def get_release_dir_for_target(self, target=None, changeto=False):
         """
         Return the release working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, release=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, release=True)
+        return self._cached_lookup(
+            'release_dir', target,
+            lambda: self._get_dir_for_target(target=target, release=True))
 
     def get_cleanmask_dir_for_target(self, target=None, changeto=False):
         """
         Return the release working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, cleanmask=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, cleanmask=True)
+        return self._cached_lookup(
+            'cleanmask_dir', target,
+            lambda: self._get_dir_for_target(target=target, cleanmask=True))
 
     def get_singledish_dir_for_target(self, target=None, changeto=False):
         """
         Return the release working directory given a target name. If
         changeto is true, then change directory to that location.
         """
-        return self._get_dir_for_target(target=target, changeto=changeto, singledish=True)
+        if changeto:
+            return self._get_dir_for_target(target=target, changeto=True, singledish=True)
+        return self._cached_lookup(
+            'singledish_dir', target,
+            lambda: self._get_dir_for_target(target=target, singledish=True))
 
     def get_path_for_casaversion(self, casa_version=None):
         """
@@ -1342,10 +1406,12 @@ class KeyHandler:
         targets in only, skip targets in skip, and return targets
         alphabetically after first and before last.
         """
-        this_target_list = \
-            list_utils.select_from_list(self._target_list, first=first, last=last,
-                                        skip=skip, only=only, loose=True)
-        return this_target_list
+        this_target_list = self._cached_lookup(
+            'targets', self._selection_key(only, skip, first, last),
+            lambda: list_utils.select_from_list(
+                self._target_list, first=first, last=last,
+                skip=skip, only=only, loose=True))
+        return list(this_target_list)
 
     def get_targets_in_ms_key(self, only=None, skip=None, first=None, last=None):
         """
@@ -1392,10 +1458,12 @@ class KeyHandler:
         targets in only, skip targets in skip, and return targets
         alphabetically after first and before last.
         """
-        this_whole_target_list = \
-            list_utils.select_from_list(self._whole_target_list, first=first, last=last,
-                                        skip=skip, only=only, loose=True)
-        return this_whole_target_list
+        this_whole_target_list = self._cached_lookup(
+            'whole_targets', self._selection_key(only, skip, first, last),
+            lambda: list_utils.select_from_list(
+                self._whole_target_list, first=first, last=last,
+                skip=skip, only=only, loose=True))
+        return list(this_whole_target_list)
 
     def get_alma_download_restrictions(self, target=None, product=None, config=None):
         """
@@ -1592,6 +1660,13 @@ class KeyHandler:
         if target == None:
             return False
 
+        return self._cached_lookup(
+            'is_linmos', target, lambda: self._is_target_linmos(target))
+
+    def _is_target_linmos(self, target):
+        """
+        Uncached body of is_target_linmos.
+        """
         if self._linmos_dict is None:
             logging.error("No linear mosaic dictionary defined.")
             return False
@@ -1609,6 +1684,13 @@ class KeyHandler:
             logging.error("Please specify a target.")
             return None
 
+        return self._cached_lookup(
+            'linmos_parts', target, lambda: self._get_parts_for_linmos(target))
+
+    def _get_parts_for_linmos(self, target):
+        """
+        Uncached body of get_parts_for_linmos.
+        """
         if self._linmos_dict is None:
             logging.error("No linear mosaic dictionary defined.")
             return None
@@ -1623,16 +1705,12 @@ class KeyHandler:
         """
         Return true or false depending on whether the target is in a linear mosaic.
         """
-        if target in self._mosaic_assign_dict.keys():
-            if return_target_name:
-                return True, self._mosaic_assign_dict[target]
-            else:
-                return True
-        else:
-            if return_target_name:
+        mosaic_name = self._mosaic_assign_dict.get(target)
+        if return_target_name:
+            if mosaic_name is None:
                 return False, target
-            else:
-                return False
+            return True, mosaic_name
+        return mosaic_name is not None
 
     def get_imaging_recipes(self, config=None, product=None, stage=None):
         """
@@ -2054,6 +2132,11 @@ class KeyHandler:
                     if this_tag not in just_arraytags:
                         just_arraytags.append(this_tag)
 
+        # Only membership tests from here on, so use sets
+        just_targets = frozenset(just_targets)
+        just_projects = frozenset(just_projects)
+        just_arraytags = frozenset(just_arraytags)
+
         # Loop over targets
         target_list = list(self._ms_dict.keys())
         target_list.sort()
@@ -2071,7 +2154,7 @@ class KeyHandler:
 
                 # This list holds the valid array tags for this target.
 
-                valid_arraytags = []
+                valid_arraytags = set()
 
                 # This mode only works with a user-supplied list of
                 # configs. Else we loop over all measurement sets.
@@ -2095,8 +2178,7 @@ class KeyHandler:
 
                             # Note the array tags in this, known to be valid, configuration
                             for this_arraytag in self.get_array_tags_for_config(this_config):
-                                if valid_arraytags.count(this_arraytag) == 0:
-                                    valid_arraytags.append(this_arraytag)
+                                valid_arraytags.add(this_arraytag)
 
                     # If there are no valid configurations skip.
                     if not has_data_for_any_config:
@@ -2121,7 +2203,7 @@ class KeyHandler:
                             continue
 
                     if strict_config and config is not None:
-                        if valid_arraytags.count(this_arraytag) == 0:
+                        if this_arraytag not in valid_arraytags:
                             continue
 
                     # loop over obs nums
@@ -2459,6 +2541,14 @@ class KeyHandler:
         if interf_config is None:
             return None
 
+        return self._cached_lookup(
+            'feather_config', interf_config,
+            lambda: self._get_feather_config_for_interf_config(interf_config))
+
+    def _get_feather_config_for_interf_config(self, interf_config):
+        """
+        Uncached body of get_feather_config_for_interf_config.
+        """
         if 'interf_config' not in self._config_dict.keys():
             return None
 
@@ -14,7 +14,10 @@ calls to CASA from this class.
 
 import os, sys, re, shutil
 import glob
+import hashlib
+import json
 import logging
+from functools import partial
 
 import numpy as np
 
@@ -43,6 +46,89 @@ from . import utilsResolutions
 
 from .clean_call import CleanCall
 
+# CASA extensions of the original cube and primary beam for each
+# imaging method.
+_ORIG_CASAEXT = {
+    'tclean': ('.image', '.pb'),
+    'sdintimaging': ('.joint.cube.image', '.joint.cube.pb'),
+    }
+
+# Processed files made by postprocessing, as (tag, ext, casa, casaext)
+# for utilsFilenames.get_cube_filenames. The extra_ext tag is appended
+# to ext by _fname_dict.
+_FNAME_SPEC = (
+    # Primary beam corrected file
+    ('pbcorr', 'pbcorr', True, '.image'),
+    # Files with round beams
+    ('round', 'round', True, '.image'),
+    ('pbcorr_round', 'pbcorr_round', True, '.image'),
+    # Weight file for use in linear mosaicking
+    ('weight', 'weight', True, '.image'),
+    ('weight_aligned', 'weight_aligned', True, '.image'),
+    # Common resolution parts for mosaic
+    ('linmos_commonres', 'linmos_commonres', True, '.image'),
+    # Aligned parts for mosaic
+    ('linmos_aligned', 'linmos_aligned', True, '.image'),
+    # Imported single dish file aligned to the interfometer data
+    ('prepped_sd', 'singledish', True, '.image'),
+    # Singledish weight for use in linear mosaicking
+    ('sd_weight', 'singledish_weight', True, '.image'),
+    # Singledish data aliged to a common grid for mosaicking
+    ('sd_aligned', 'singledish_aligned', True, '.image'),
+    # Singledish weight for use in linear mosaicking now on a common
+    # astrometric grid
+    ('sd_weight_aligned', 'singledish_weight_aligned', True, '.image'),
+    # Compressed files with edges trimmed off and smallest reasonable
+    # pixel size.
+    ('trimmed', 'trimmed', True, '.image'),
+    ('pbcorr_trimmed', 'pbcorr_trimmed', True, '.image'),
+    ('trimmed_pb', 'trimmed', True, '.pb'),
+    # Files converted to Kelvin, including FITS output files
+    ('trimmed_k', 'trimmed_k', True, '.image'),
+    ('trimmed_k_fits', 'trimmed_k', False, None),
+    ('pbcorr_trimmed_k', 'pbcorr_trimmed_k', True, '.image'),
+    ('pbcorr_trimmed_k_fits', 'pbcorr_trimmed_k', False, None),
+    ('trimmed_pb_fits', 'trimmed_pb', False, None),
+    )
+
+# Single dish cube imported and stripped of degenerate axes once per
+# target and product and shared by all configs (see
+# task_stage_singledish). It does not depend on the config, so
+# 'singledish' fills the config slot of the name.
+_SD_STAGE_SPEC = (
+    ('staged_sd', 'staged', True, '.image'),
+    )
+
+# Copy command for staging CASA images. GNU cp can clone the files on
+# copy-on-write file systems (btrfs, XFS, ...) and falls back to a
+# normal copy elsewhere.
+if sys.platform.startswith('linux'):
+    _COPY_TREE_CMD = 'cp -r --reflink=auto '
+else:
+    _COPY_TREE_CMD = 'cp -r '
+
+def _file_signature(path):
+    """
+    Return [mtime, size] for a file or a CASA image directory, or None
+    if path is missing. For an image the latest mtime and the total
+    size are taken over every file in the tree, so that changes in
+    subtables such as mask0/ are picked up too.
+    """
+    if os.path.isfile(path):
+        this_stat = os.stat(path)
+        return([this_stat.st_mtime, this_stat.st_size])
+    if not os.path.isdir(path):
+        return(None)
+    mtime = os.stat(path).st_mtime
+    size = 0
+    for this_root, dir_list, file_list in os.walk(path):
+        mtime = max(mtime, os.stat(this_root).st_mtime)
+        for this_file in file_list:
+            this_stat = os.stat(os.path.join(this_root, this_file))
+            mtime = max(mtime, this_stat.st_mtime)
+            size += this_stat.st_size
+    return([mtime, size])
+
 
 class PostProcessHandler(handlerTemplate.HandlerTemplate):
     """
@@ -57,11 +143,77 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         dry_run = False,
         ):
 
+        # File name dictionaries already built, see _fname_dict
+        self._fname_cache = {}
+
+        # Existence of imaging products, cached while loop_postprocess
+        # runs (see _has_imaging_file). None means no caching.
+        self._isdir_cache = None
+
+        # Skip tasks whose inputs have not changed, see
+        # set_skip_unchanged
+        self._skip_unchanged = False
+
+        # Single dish cubes imported once per (target, product) and
+        # shared by all configs, see task_stage_singledish. None means
+        # no sharing.
+        self._sd_stage_cache = None
+
         # inherit template class
         handlerTemplate.HandlerTemplate.__init__(self, key_handler = key_handler, dry_run = dry_run)
 
+    def __getstate__(
+        self):
+        """
+        State sent to worker processes by the parallel target loops.
+        The file name cache is rebuilt on demand, so leave it behind.
+        """
+        state = self.__dict__.copy()
+        state['_fname_cache'] = {}
+        return(state)
+
+    def set_key_handler(
+        self,
+        key_handler = None,
+        nobuild = False):
+        """
+        Set the keyhandler object and forget any file names built
+        with the previous one.
+        """
+        self._fname_cache = {}
+        return(handlerTemplate.HandlerTemplate.set_key_handler(
+            self, key_handler = key_handler, nobuild = nobuild))
+
+    def set_skip_unchanged(
+        self,
+        skip_unchanged = False):
+        """
+        Toggle incremental runs. When True, tasks that support it
+        write a small .stamp file next to their output recording the
+        inputs and parameters used, and on later runs skip the work if
+        the output exists and the stamp still matches.
+        """
+        self._skip_unchanged = skip_unchanged
+        return(None)
+
 #region File name routines
 
+    def _has_imaging_file(
+        self,
+        path,
+        ):
+        """
+        os.path.isdir for products of the imaging stage, which
+        postprocessing reads but never writes. While loop_postprocess
+        runs the result is remembered, so each imaging product is
+        stat'ed once rather than once per loop and recipe.
+        """
+        if self._isdir_cache is None:
+            return(os.path.isdir(path))
+        if path not in self._isdir_cache:
+            self._isdir_cache[path] = os.path.isdir(path)
+        return(self._isdir_cache[path])
+
     ###########################################
     # Defined file names for various products #
     ###########################################
@@ -73,6 +225,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         product=None,
         imaging_method='tclean',
         extra_ext='',
+        directory=None,
         ):
         """
         Make the file name dictionary for all postprocess files. This
@@ -81,6 +234,50 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         aligned, etc.) given some target, config, and product. This
         routine has a lot of hard-coded knowledge about our
         postprocessing conventions.
+
+        If directory is set, the names are joined to it so that they
+        can be passed straight to the CASA routines (the single dish
+        file, which carries its own directory, is left alone).
+
+        The dictionaries are built once per (target, config, product,
+        imaging_method, extra_ext, directory) and then served from a
+        cache, since every task and recipe asks for them again. Each
+        call gets its own copy, so callers may modify the result.
+        """
+
+        cache_key = (target, config, product, imaging_method, extra_ext, directory)
+        if cache_key in self._fname_cache:
+            return(dict(self._fname_cache[cache_key]))
+
+        if directory is None:
+            fname_dict = self._build_fname_dict(
+                target=target, config=config, product=product,
+                imaging_method=imaging_method, extra_ext=extra_ext)
+        else:
+            fname_dict = self._fname_dict(
+                target=target, config=config, product=product,
+                imaging_method=imaging_method, extra_ext=extra_ext)
+            if len(fname_dict) == 0:
+                return(fname_dict)
+            fname_dict = dict(
+                (tag, name if tag == 'orig_sd' else os.path.join(directory, name))
+                for tag, name in fname_dict.items())
+
+        if len(fname_dict) > 0:
+            self._fname_cache[cache_key] = dict(fname_dict)
+
+        return(fname_dict)
+
+    def _build_fname_dict(
+        self,
+        target=None,
+        config=None,
+        product=None,
+        imaging_method='tclean',
+        extra_ext='',
+        ):
+        """
+        Build the file name dictionary for _fname_dict. Not cached.
         """
 
         # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
@@ -99,242 +296,117 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             logger.error("Need a config.")
             return()
 
-        # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
-        # Initialize
-        # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
-
-        fname_dict = {}
-
         # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
         # Original files
         # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
 
-        # Original cube
-
-        tag = 'orig'
-
-        if imaging_method == 'tclean':
-            casaext = '.image'
-        elif imaging_method == 'sdintimaging':
-            casaext = '.joint.cube.image'
-        else:
+        if imaging_method not in _ORIG_CASAEXT:
             logger.error('imaging_method %s not recognised' % imaging_method)
             raise Exception('imaging_method %s not recognised' % imaging_method)
 
-        orig_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = None,
-            casa = True,
-            casaext = casaext)
-        fname_dict[tag] = orig_file
-
-        # Original primary beam file
+        orig_casaext, pb_casaext = _ORIG_CASAEXT[imaging_method]
 
-        if imaging_method == 'tclean':
-            casaext = '.pb'
-        elif imaging_method == 'sdintimaging':
-            casaext = '.joint.cube.pb'
-
-        tag = 'pb'
-        pb_file = utilsFilenames.get_cube_filename(
+        fname_dict = utilsFilenames.get_cube_filenames(
             target = target, config = config, product = product,
-            ext = None,
-            casa = True,
-            casaext = casaext)
-        fname_dict[tag] = pb_file
+            spec = (('orig', None, True, orig_casaext),
+                    ('pb', None, True, pb_casaext)))
+        if fname_dict is None:
+            return()
 
         # Original single dish file (note that this comes with a
         # directory)
 
         has_sd = self._kh.has_singledish(target=target, product=product)
-        tag = 'orig_sd'
         if has_sd:
-            orig_sd_file = self._kh.get_sd_filename(
+            fname_dict['orig_sd'] = self._kh.get_sd_filename(
                 target = target, product = product)
-            fname_dict[tag] = orig_sd_file
         else:
-            fname_dict[tag] = ''
+            fname_dict['orig_sd'] = ''
 
         # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
         # Processed files (apply the extra_ext tag here)
         # &%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%
 
-        # Primary beam corrected file
-
-        tag = 'pbcorr'
-        pbcorr_file = utilsFilenames.get_cube_filename(
+        fname_dict.update(utilsFilenames.get_cube_filenames(
             target = target, config = config, product = product,
-            ext = 'pbcorr'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = pbcorr_file
+            spec = [(tag, ext+extra_ext, casa, casaext)
+                    for tag, ext, casa, casaext in _FNAME_SPEC]))
 
-        # Files with round beams
-
-        tag = 'round'
-        round_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'round'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = round_file
-
-        tag = 'pbcorr_round'
-        pbcorr_round_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'pbcorr_round'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = pbcorr_round_file
-
-        # Weight file for use in linear mosaicking
-
-        tag = 'weight'
-        weight_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'weight'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = weight_file
-
-        tag = 'weight_aligned'
-        weight_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'weight_aligned'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = weight_file
-
-        # Common resolution parts for mosaic
-
-        tag = 'linmos_commonres'
-        commonres_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'linmos_commonres'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = commonres_file
-
-        # Aligned parts for mosaic
-
-        tag = 'linmos_aligned'
-        aligned_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'linmos_aligned'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = aligned_file
-
-        # Imported single dish file aligned to the interfometer data
-
-        tag = 'prepped_sd'
-        prepped_sd_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'singledish'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = prepped_sd_file
-
-        # Singledish weight for use in linear mosaicking
-
-        tag = 'sd_weight'
-        sd_weight_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'singledish_weight'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = sd_weight_file
+        fname_dict.update(utilsFilenames.get_cube_filenames(
+            target = target, config = 'singledish', product = product,
+            spec = [(tag, ext+extra_ext, casa, casaext)
+                    for tag, ext, casa, casaext in _SD_STAGE_SPEC]))
 
-        # Singledish data aliged to a common grid for mosaicking
-
-        tag = 'sd_aligned'
-        sd_align_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'singledish_aligned'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = sd_align_file
-
-        # Singledish weight for use in linear mosaicking now on a
-        # common astrometric grid
-
-        tag = 'sd_weight_aligned'
-        sd_weight_aligned_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'singledish_weight_aligned'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = sd_weight_aligned_file
+        # Return
 
-        # Compressed files with edges trimmed off and smallest
-        # reasonable pixel size.
+        return(fname_dict)
 
-        tag = 'trimmed'
-        trimmed_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'trimmed'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = trimmed_file
+    def _make_stamp(
+        self,
+        infiles = None,
+        params = None,
+        ):
+        """
+        Build the stamp describing one task run: the signature of each
+        input file and a hash of the parameters.
+        """
+        if infiles is None:
+            infiles = []
+        if params is None:
+            params = {}
+        params_hash = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return({'inputs':{this_file:_file_signature(this_file) for this_file in infiles},
+                'params_hash':params_hash})
+
+    def _is_unchanged(
+        self,
+        infiles = None,
+        outfile = None,
+        params = None,
+        ):
+        """
+        Return True if skip_unchanged is set, outfile exists, and its
+        stamp matches the current inputs and parameters.
+        """
+        if not self._skip_unchanged:
+            return(False)
 
-        tag = 'pbcorr_trimmed'
-        pbcorr_trimmed_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'pbcorr_trimmed'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = pbcorr_trimmed_file
+        if _file_signature(outfile) is None:
+            return(False)
 
-        tag = 'trimmed_pb'
-        trimmed_pb_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'trimmed'+extra_ext,
-            casa = True,
-            casaext = '.pb')
-        fname_dict[tag] = trimmed_pb_file
+        try:
+            with open(outfile+'.stamp', 'r') as stamp_file:
+                old_stamp = json.load(stamp_file)
+        except (IOError, OSError, ValueError):
+            return(False)
 
-        # Files converted to Kelvin, including FITS output files
+        if old_stamp != self._make_stamp(infiles=infiles, params=params):
+            return(False)
 
-        tag = 'trimmed_k'
-        trimmed_k_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'trimmed_k'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = trimmed_k_file
+        logger.info("Inputs unchanged, skipping "+outfile)
+        return(True)
 
-        tag = 'trimmed_k_fits'
-        trimmed_k_fits = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'trimmed_k'+extra_ext,
-            casa = False)
-        fname_dict[tag] = trimmed_k_fits
-
-        tag = 'pbcorr_trimmed_k'
-        pbcorr_trimmed_k_file = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'pbcorr_trimmed_k'+extra_ext,
-            casa = True,
-            casaext = '.image')
-        fname_dict[tag] = pbcorr_trimmed_k_file
-
-        tag = 'pbcorr_trimmed_k_fits'
-        pbcorr_trimmed_k_fits = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'pbcorr_trimmed_k'+extra_ext,
-            casa = False)
-        fname_dict[tag] = pbcorr_trimmed_k_fits
+    def _write_stamp(
+        self,
+        infiles = None,
+        outfile = None,
+        params = None,
+        ):
+        """
+        Record the inputs and parameters used to make outfile, if
+        skip_unchanged is set.
+        """
+        if (not self._skip_unchanged) or self._dry_run:
+            return(None)
 
-        tag = 'trimmed_pb_fits'
-        trimmed_pb_fits = utilsFilenames.get_cube_filename(
-            target = target, config = config, product = product,
-            ext = 'trimmed_pb'+extra_ext,
-            casa = False)
-        fname_dict[tag] = trimmed_pb_fits
+        if _file_signature(outfile) is None:
+            return(None)
 
-        # Return
+        with open(outfile+'.stamp', 'w') as stamp_file:
+            json.dump(self._make_stamp(infiles=infiles, params=params), stamp_file)
 
-        return(fname_dict)
+        return(None)
 
 #endregion
 
@@ -362,12 +434,13 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_imaging_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         # Copy the primary beam and the interferometric imaging
 
+        copy_list = []
         for this_tag in ['orig', 'pb']:
 
             infile = fname_dict_in[this_tag]
@@ -375,8 +448,8 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             # Check input file existence
             if check_files:
-                if not (os.path.isdir(indir+infile)):
-                    logger.warning("Missing "+indir+infile)
+                if not (os.path.isdir(infile)):
+                    logger.warning("Missing "+infile)
                     continue
 
             logger.info("")
@@ -389,19 +462,35 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             logger.info("Staging "+outfile)
 
             if (not self._dry_run) and casa_enabled:
-                os.system('rm -rf ' + outdir + outfile)
-                os.system('cp -r ' + indir + infile + ' ' + outdir + outfile)
+                copy_list.append(
+                    'rm -rf ' + outfile + ' && ' +
+                    _COPY_TREE_CMD + infile + ' ' + outfile)
                 # ccr.copy_dropdeg(
-                #     infile=indir+infile,
-                #     outfile=outdir+outfile,
+                #     infile=infile,
+                #     outfile=outfile,
                 #     overwrite=True)
 
+        # The copies are pure I/O and independent, so overlap them
+        # where concurrent.futures is available (not under Python 2).
+
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            ThreadPoolExecutor = None
+
+        if (len(copy_list) > 1) and (ThreadPoolExecutor is not None):
+            with ThreadPoolExecutor(max_workers=len(copy_list)) as executor:
+                list(executor.map(os.system, copy_list))
+        else:
+            for this_copy in copy_list:
+                os.system(this_copy)
+
         # in case of merged datasets with non-identical frequency setups imaged with per-plane beam, 
         # some edge channels will have much coarser beam, we trim these edge channels here. 
         if trim_coarse_beam_edge_channels:
             ccr.trim_coarse_beam_edge_channels(
-                infile=outdir+fname_dict_out['orig'],
-                inpbfile=outdir+fname_dict_out['pb'],
+                infile=fname_dict_out['orig'],
+                inpbfile=fname_dict_out['pb'],
                 inplace=True,
             )
 
@@ -425,7 +514,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         file_dir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict = self._fname_dict(target=target, config=config, product=product, extra_ext=extra_ext,
-                                      imaging_method=imaging_method)
+                                      imaging_method=imaging_method, directory=file_dir)
 
         # Copy the primary beam and the interferometric imaging
 
@@ -437,16 +526,16 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             # Check input file existence
             if check_files:
-                if not (os.path.isdir(file_dir+file_name)):
-                    logger.warning("Missing "+file_dir+file_name)
+                if not (os.path.isdir(file_name)):
+                    logger.warning("Missing "+file_name)
                     continue
 
             if not self._dry_run:
-                ccr.copy_dropdeg(file_dir + file_name, file_dir + file_name + '_nodeg', overwrite=True)
+                ccr.copy_dropdeg(file_name, file_name + '_nodeg', overwrite=True)
 
-                os.system('rm -rf ' + file_dir + file_name)
-                os.system('cp -r ' + file_dir + file_name + '_nodeg ' + file_dir + file_name)
-                os.system('rm -rf ' + file_dir + file_name + '_nodeg')
+                os.system('rm -rf ' + file_name)
+                os.system('cp -r ' + file_name + '_nodeg ' + file_name)
+                os.system('rm -rf ' + file_name + '_nodeg')
 
         return()
 
@@ -472,9 +561,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         # Pull in the pblimit for setting the cutoff
         recipe_list = self._kh.get_imaging_recipes(config=config, product=product)
@@ -488,11 +577,11 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
-                logger.warning("Missing "+indir+infile)
+            if not (os.path.isdir(infile)):
+                logger.warning("Missing "+infile)
                 return()
-            if not (os.path.isdir(indir+pbfile)):
-                logger.warning("Missing "+indir+pbfile)
+            if not (os.path.isdir(pbfile)):
+                logger.warning("Missing "+pbfile)
                 return()
 
         # Apply the primary beam correction to the data.
@@ -509,13 +598,18 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         logger.info("Correcting from "+infile)
         logger.info("Correcting using "+pbfile)
 
+        stamp_params = {'task':'pbcorr', 'cutoff':cutoff}
+        if self._is_unchanged(infiles=[infile, pbfile], outfile=outfile, params=stamp_params):
+            return()
+
         if (not self._dry_run) and casa_enabled:
             ccr.primary_beam_correct(
-                infile=indir+infile,
-                outfile=outdir+outfile,
-                pbfile=indir+pbfile,
+                infile=infile,
+                outfile=outfile,
+                pbfile=pbfile,
                 cutoff=cutoff,
                 overwrite=True)
+            self._write_stamp(infiles=[infile, pbfile], outfile=outfile, params=stamp_params)
 
         return()
 
@@ -544,9 +638,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         infile = fname_dict_in[in_tag]
         outfile = fname_dict_out[out_tag]
@@ -554,7 +648,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
+            if not (os.path.isdir(infile)):
                 logger.warning("Missing "+infile)
                 return()
 
@@ -573,12 +667,17 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         if force_beam_as is not None:
             logger.info("Forcing beam to "+str(force_beam_as))
 
+        stamp_params = {'task':'round_beam', 'force_beam':force_beam_as}
+        if self._is_unchanged(infiles=[infile], outfile=outfile, params=stamp_params):
+            return()
+
         if (not self._dry_run) and casa_enabled:
             ccr.convolve_to_round_beam(
-                infile=indir+infile,
-                outfile=outdir+outfile,
+                infile=infile,
+                outfile=outfile,
                 force_beam=force_beam_as,
                 overwrite=True)
+            self._write_stamp(infiles=[infile], outfile=outfile, params=stamp_params)
 
         return()
 
@@ -600,13 +699,14 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         # Generate file names
 
-        indir = ''
+        # The single dish file name carries its own directory.
+
         outdir = self._kh.get_postprocess_dir_for_target(target)
         tempdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, directory=tempdir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, directory=outdir)
 
         template = fname_dict_in[template_tag]
         infile = fname_dict_in['orig_sd']
@@ -615,12 +715,12 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if (not (os.path.isdir(indir+infile))) and \
-                    (not (os.path.isfile(indir+infile))):
+            if (not (os.path.isdir(infile))) and \
+                    (not (os.path.isfile(infile))):
                 logger.warning("Missing "+infile)
                 return()
-            if not (os.path.isdir(tempdir+template)):
-                logger.warning("Missing "+tempdir+template)
+            if not (os.path.isdir(template)):
+                logger.warning("Missing "+template)
                 return()
 
         # Stage the singledish data for feathering
@@ -638,15 +738,53 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         logger.info("Using interferometric template "+template)
 
         if (not self._dry_run) and casa_enabled:
-            cfr.prep_sd_for_feather(
-                sdfile_in=indir+infile,
-                sdfile_out=outdir+outfile,
-                interf_file=tempdir+template,
-                do_import=True,
-                do_dropdeg=True,
-                do_align=True,
-                do_checkunits=True,
-                overwrite=True)
+
+            # Importing the single dish cube and dropping degenerate
+            # axes do not depend on the config, so do that once per
+            # target and product and only align per config.
+
+            staged_sd = None
+            if self._sd_stage_cache is not None:
+                staged_sd = self._sd_stage_cache.get((target, product))
+
+            do_import = staged_sd is None
+            if do_import:
+                staged_sd = fname_dict_out['staged_sd']
+                # Record the copy before writing it, so that the
+                # cleanup in _prep_one_target also catches a partial
+                # import.
+                if self._sd_stage_cache is not None:
+                    self._sd_stage_cache[(target, product)] = staged_sd
+            else:
+                logger.info("Reusing staged single dish "+staged_sd)
+
+            # Without a cache the staged copy is only for this config,
+            # so remove it however the staging ends.
+
+            try:
+                if do_import:
+                    cfr.prep_sd_for_feather(
+                        sdfile_in=infile,
+                        sdfile_out=staged_sd,
+                        interf_file=template,
+                        do_import=True,
+                        do_dropdeg=True,
+                        do_align=False,
+                        do_checkunits=False,
+                        overwrite=True)
+
+                cfr.prep_sd_for_feather(
+                    sdfile_in=staged_sd,
+                    sdfile_out=outfile,
+                    interf_file=template,
+                    do_import=False,
+                    do_dropdeg=False,
+                    do_align=True,
+                    do_checkunits=True,
+                    overwrite=True)
+            finally:
+                if self._sd_stage_cache is None:
+                    os.system('rm -rf '+staged_sd)
 
         return()
 
@@ -677,9 +815,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         image_file = fname_dict_in[image_tag]
         infile = fname_dict_in[in_tag]
@@ -688,10 +826,10 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
+            if not (os.path.isdir(infile)):
                 logger.warning("Missing "+infile)
                 return()
-            if not (os.path.isdir(indir+image_file)):
+            if not (os.path.isdir(image_file)):
                 logger.warning("Missing "+image_file)
                 return()
 
@@ -712,10 +850,10 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         if (not self._dry_run) and casa_enabled:
             cmr.generate_weight_file(
-                image_file = indir+image_file,
-                input_file = indir+infile,
+                image_file = image_file,
+                input_file = infile,
                 input_type = input_type,
-                outfile = indir + outfile,
+                outfile = outfile,
                 scale_by_noise = scale_by_noise,
                 overwrite=True)
 
@@ -743,9 +881,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, directory=outdir)
 
         image_file = fname_dict_in[image_tag]
         outfile = fname_dict_out[out_tag]
@@ -753,7 +891,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+image_file)):
+            if not (os.path.isdir(image_file)):
                 logger.warning("Missing "+image_file)
                 return()
 
@@ -773,10 +911,10 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         if (not self._dry_run) and casa_enabled:
             cmr.generate_weight_file(
-                image_file = indir+image_file,
+                image_file = image_file,
                 input_value = 1.0,
                 input_type = 'weight',
-                outfile = indir + outfile,
+                outfile = outfile,
                 scale_by_noise = True,
                 overwrite=True)
 
@@ -814,7 +952,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
             target=target, config=config, product=product,
-            extra_ext=extra_ext_in)
+            extra_ext=extra_ext_in, directory=indir)
 
         # Note that feather changes the config
 
@@ -823,7 +961,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         fname_dict_out = self._fname_dict(
             target=target, config=feather_config, product=product,
-            extra_ext=extra_ext_out)
+            extra_ext=extra_ext_out, directory=outdir)
 
         interf_file = fname_dict_in[interf_tag]
         sd_file = fname_dict_in[sd_tag]
@@ -863,12 +1001,12 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             if not self._dry_run:
                 cfr.feather_two_cubes(
-                    interf_file=indir+interf_file,
-                    sd_file=indir+sd_file,
-                    out_file=outdir+outfile,
+                    interf_file=interf_file,
+                    sd_file=sd_file,
+                    out_file=outfile,
                     do_blank=True,
                     do_apodize=True,
-                    apod_file=indir+apod_file,
+                    apod_file=apod_file,
                     apod_cutoff=0.0,
                     overwrite=True)
 
@@ -876,9 +1014,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             if (not self._dry_run) and casa_enabled:
                 cfr.feather_two_cubes(
-                    interf_file=indir+interf_file,
-                    sd_file=indir+sd_file,
-                    out_file=outdir+outfile,
+                    interf_file=interf_file,
+                    sd_file=sd_file,
+                    out_file=outfile,
                     do_blank=True,
                     do_apodize=False,
                     apod_file=None,
@@ -889,7 +1027,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             interf_weight_exists = False
             interf_weight_file = fname_dict_in['weight']
-            if os.path.isdir(indir+interf_weight_file):
+            if os.path.isdir(interf_weight_file):
                 interf_weight_exists = True
             else:
                 logger.info("Interferometric weight file not found "+interf_weight_file)
@@ -907,8 +1045,8 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                 logger.info("Copying from "+interf_weight_file)
                 logger.info("Copying to "+out_weight_file)
                 if (not self._dry_run) and casa_enabled:
-                    ccr.copy_dropdeg(infile=indir+interf_weight_file,
-                                     outfile=outdir+out_weight_file,
+                    ccr.copy_dropdeg(infile=interf_weight_file,
+                                     outfile=out_weight_file,
                                      overwrite=True)
         return()
 
@@ -932,11 +1070,11 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             logger.warning('This should only be run for sdintimaging')
             return
 
-        fname_dict_in = self._fname_dict(target=target, product=product, config=config,
-                                         imaging_method=imaging_method)
-
         imaging_dir = self._kh.get_imaging_dir_for_target(target)
-        using_sdint = os.path.isdir(imaging_dir + fname_dict_in['orig'])
+        fname_dict_imaging = self._fname_dict(target=target, product=product, config=config,
+                                              imaging_method=imaging_method, directory=imaging_dir)
+
+        using_sdint = self._has_imaging_file(fname_dict_imaging['orig'])
         is_mosaic = self._kh.is_target_linmos(target)
 
         # If not a mosaic and we're not sdintimaging, skip
@@ -950,19 +1088,22 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             mosaic_parts = self._kh.get_parts_for_linmos(target)
             for mosaic_part in mosaic_parts:
+                imaging_dir = self._kh.get_imaging_dir_for_target(mosaic_part)
                 fname_dict_mosaic = self._fname_dict(
                     target=mosaic_part, product=product, config=config,
-                    imaging_method=imaging_method)
-                imaging_dir = self._kh.get_imaging_dir_for_target(mosaic_part)
-                using_sdint = os.path.isdir(imaging_dir + fname_dict_mosaic['orig'])
+                    imaging_method=imaging_method, directory=imaging_dir)
+                using_sdint = self._has_imaging_file(fname_dict_mosaic['orig'])
                 if using_sdint:
                     break
             if not using_sdint:
                 return
 
         outdir = self._kh.get_postprocess_dir_for_target(target)
+        fname_dict_in = self._fname_dict(target=target, product=product, config=config,
+                                         imaging_method=imaging_method, directory=outdir)
         feather_config = self._kh.get_feather_config_for_interf_config(interf_config=config)
-        fname_dict_out = self._fname_dict(target=target, product=product, config=feather_config)
+        fname_dict_out = self._fname_dict(target=target, product=product, config=feather_config,
+                                          directory=outdir)
 
         logger.info("")
         logger.info("&%&%&%&%&%&%&%&%&%&%&%&%&%&%")
@@ -972,15 +1113,21 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         logger.info("")
 
         for key in fname_dict_in.keys():
-            item = fname_dict_in[key]
+
+            # The single dish file lives outside the postprocess
+            # folder, and the staged single dish copy does not depend
+            # on the config, so neither is renamed.
+            if key in ('orig_sd', 'staged_sd'):
+                continue
+
+            file_name = fname_dict_in[key]
 
             # Make sure we don't just delete the whole postprocess folder
-            if item == '':
+            if os.path.normpath(file_name) == os.path.normpath(outdir):
                 continue
 
-            file_name = outdir + item
             if os.path.exists(file_name):
-                new_file_name = outdir + fname_dict_out[key]
+                new_file_name = fname_dict_out[key]
                 command = 'mv -f %s %s' % (file_name, new_file_name)
                 os.system('rm -rf %s' % new_file_name)
                 os.system(command)
@@ -998,7 +1145,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             do_trimrind = True,
             do_pb_too = True,
             in_pb_tag = 'pb',
-            out_pb_tag = 'pb_trimmed',
+            out_pb_tag = 'trimmed_pb',
             extra_ext_in = '',
             extra_ext_out = '',
             check_files = True
@@ -1014,20 +1161,20 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
-        infile = fname_dict_in['pbcorr_round']
-        outfile = fname_dict_out['pbcorr_trimmed']
+        infile = fname_dict_in[in_tag]
+        outfile = fname_dict_out[out_tag]
 
-        infile_pb = fname_dict_in['pb']
-        outfile_pb = fname_dict_out['trimmed_pb']
+        infile_pb = fname_dict_in[in_pb_tag]
+        outfile_pb = fname_dict_out[out_pb_tag]
 
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
+            if not (os.path.isdir(infile)):
                 logger.warning("Missing "+infile)
                 return()
 
@@ -1045,8 +1192,8 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         if (not self._dry_run) and casa_enabled:
             ccr.trim_cube(
-                infile=indir+infile,
-                outfile=outdir+outfile,
+                infile=infile,
+                outfile=outfile,
                 overwrite=True,
                 inplace=False,
                 min_pixperbeam=3,
@@ -1054,7 +1201,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
             if do_trimrind:
                 ccr.trim_rind(
-                    infile=outdir+outfile,
+                    infile=outfile,
                     inplace=True,
                     pixels=1)
 
@@ -1063,14 +1210,14 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             return()
 
         if check_files:
-            if not (os.path.isdir(indir+infile_pb)):
+            if not (os.path.isdir(infile_pb)):
                 logger.warning("Missing "+infile_pb)
                 return()
 
-        template = fname_dict_out['pbcorr_trimmed']
+        template = outfile
 
         if check_files:
-            if not (os.path.isdir(outdir+template)):
+            if not (os.path.isdir(template)):
                 logger.warning("Missing "+template)
                 return()
 
@@ -1082,9 +1229,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         if not self._dry_run:
             ccr.align_to_target(
-                infile=indir+infile_pb,
-                outfile=outdir+outfile_pb,
-                template=outdir+template,
+                infile=infile_pb,
+                outfile=outfile_pb,
+                template=template,
                 interpolation='cubic',
                 overwrite=True,
                 )
@@ -1113,9 +1260,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         infile = fname_dict_in[in_tag]
         outfile = fname_dict_out[out_tag]
@@ -1123,7 +1270,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
+            if not (os.path.isdir(infile)):
                 logger.warning("Missing "+infile)
                 return()
 
@@ -1140,13 +1287,18 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         logger.info("Creating "+outfile)
         logger.info("Converting from original file "+infile)
 
+        stamp_params = {'task':'convert_units'}
+        if self._is_unchanged(infiles=[infile], outfile=outfile, params=stamp_params):
+            return()
+
         if (not self._dry_run) and casa_enabled:
             ccr.convert_jytok(
-                infile=indir+infile,
-                outfile=outdir+outfile,
+                infile=infile,
+                outfile=outfile,
                 overwrite=True,
                 inplace=False,
                 )
+            self._write_stamp(infiles=[infile], outfile=outfile, params=stamp_params)
 
         return()
 
@@ -1175,9 +1327,9 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         indir = self._kh.get_postprocess_dir_for_target(target)
         outdir = self._kh.get_postprocess_dir_for_target(target)
         fname_dict_in = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_in, imaging_method=imaging_method, directory=indir)
         fname_dict_out = self._fname_dict(
-            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method)
+            target=target, config=config, product=product, extra_ext=extra_ext_out, imaging_method=imaging_method, directory=outdir)
 
         infile = fname_dict_in[in_tag]
         outfile = fname_dict_out[out_tag]
@@ -1185,7 +1337,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Check input file existence
 
         if check_files:
-            if not (os.path.isdir(indir+infile)):
+            if not (os.path.isdir(infile)):
                 logger.warning("Missing "+infile)
                 return()
 
@@ -1202,10 +1354,12 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         logger.info("Export to "+outfile)
         logger.info("Writing from input cube "+infile)
 
-        if not self._dry_run:
+        stamp_params = {'task':'export_to_fits', 'object':target.upper(), 'round_beam':True}
+        unchanged = self._is_unchanged(infiles=[infile], outfile=outfile, params=stamp_params)
+        if (not unchanged) and (not self._dry_run):
             ccr.export_and_cleanup(
-                infile=indir+infile,
-                outfile=outdir+outfile,
+                infile=infile,
+                outfile=outfile,
                 overwrite=True,
                 remove_cards=[],
                 add_cards={'OBJECT':target.upper()},
@@ -1214,6 +1368,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                 round_beam=True,
                 roundbeam_tol=0.01,
                 )
+            self._write_stamp(infiles=[infile], outfile=outfile, params=stamp_params)
 
         if do_pb_too is False:
             return()
@@ -1224,17 +1379,19 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         outfile_pb = fname_dict_out[out_pb_tag]
 
         if check_files:
-            if not (os.path.isdir(indir+infile_pb)):
+            if not (os.path.isdir(infile_pb)):
                 logger.warning("Missing "+infile_pb)
                 return()
 
         logger.info("Writing from primary beam "+infile_pb)
         logger.info("Writing output primary beam "+outfile_pb)
 
-        if (not self._dry_run) and casa_enabled:
+        stamp_params = {'task':'export_to_fits', 'object':target.upper(), 'round_beam':False}
+        unchanged = self._is_unchanged(infiles=[infile_pb], outfile=outfile_pb, params=stamp_params)
+        if (not unchanged) and (not self._dry_run) and casa_enabled:
             ccr.export_and_cleanup(
-                infile=indir+infile_pb,
-                outfile=outdir+outfile_pb,
+                infile=infile_pb,
+                outfile=outfile_pb,
                 overwrite=True,
                 remove_cards=[],
                 add_cards={'OBJECT':target.upper()},
@@ -1243,6 +1400,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                 round_beam=False,
                 roundbeam_tol=0.01,
                 )
+            self._write_stamp(infiles=[infile_pb], outfile=outfile_pb, params=stamp_params)
 
         return()
 
@@ -1279,15 +1437,17 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             this_part_dict_in = self._fname_dict(
                 target=this_part, config=config, product=product,
                 extra_ext=extra_ext_in,
+                directory=indir,
                 )
 
             this_part_dict_out = self._fname_dict(
                 target=this_part, config=config, product=product,
                 extra_ext=extra_ext_out,
+                directory=outdir,
                 )
 
-            infile_list.append(indir+this_part_dict_in[in_tag])
-            outfile_list.append(outdir+this_part_dict_out[out_tag])
+            infile_list.append(this_part_dict_in[in_tag])
+            outfile_list.append(this_part_dict_out[out_tag])
 
         logger.info("")
         logger.info("&%&%&%&%&%&%&%&%&%&%&%&%&%")
@@ -1320,6 +1480,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                 target_res = target_res,
                 pixel_padding = pixel_padding,
                 overwrite=True,
+                nproc = self._max_workers,
                 )
 
         return()
@@ -1352,9 +1513,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             logger.error("Mismatch in input and output list tag list.")
             return(None)
 
-        out_tag_dict = {}
-        for ii in range(len(in_tags)):
-            out_tag_dict[in_tags[ii]] = out_tags[ii]
+        out_tag_dict = dict(zip(in_tags, out_tags))
 
         # Generate file names
 
@@ -1371,18 +1530,20 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             this_part_dict_in = self._fname_dict(
                 target=this_part, config=config, product=product,
                 extra_ext=extra_ext_in,
+                directory=indir,
                 )
 
             this_part_dict_out = self._fname_dict(
                 target=this_part, config=config, product=product,
                 extra_ext=extra_ext_out,
+                directory=outdir,
                 )
 
             for this_tag_in in in_tags:
 
                 this_tag_out = out_tag_dict[this_tag_in]
-                infile_list.append(indir+this_part_dict_in[this_tag_in])
-                outfile_list.append(outdir+this_part_dict_out[this_tag_out])
+                infile_list.append(this_part_dict_in[this_tag_in])
+                outfile_list.append(this_part_dict_out[this_tag_out])
 
         logger.info("")
         logger.info("&%&%&%&%&%&%&%&%&%&%&%&%&%")
@@ -1447,7 +1608,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
         fname_dict_out = self._fname_dict(
             target=target, config=config, product=product,
-            extra_ext=extra_ext_out)
+            extra_ext=extra_ext_out, directory=outdir)
 
         outfile = fname_dict_out[out_tag]
 
@@ -1463,10 +1624,11 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             this_part_dict_in = self._fname_dict(
                 target=this_part, config=config, product=product,
                 extra_ext=extra_ext_in,
+                directory=indir,
                 )
 
-            infile_list.append(indir+this_part_dict_in[image_tag])
-            weightfile_list.append(indir+this_part_dict_in[weight_tag])
+            infile_list.append(this_part_dict_in[image_tag])
+            weightfile_list.append(this_part_dict_in[weight_tag])
 
         logger.info("")
         logger.info("&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%&%")
@@ -1484,7 +1646,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             cmr.mosaic_aligned_data(
                 infile_list = infile_list,
                 weightfile_list = weightfile_list,
-                outfile = outdir+outfile,
+                outfile = outfile,
                 overwrite=True)
 
         return()
@@ -1516,18 +1678,24 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         # Work out file names and note whether the target is part of a
         # mosaic, has single dish data, etc.
 
+        imaging_dir = self._kh.get_imaging_dir_for_target(target)
         fname_dict = self._fname_dict(
-            target=target, product=product, config=config, imaging_method=imaging_method)
+            target=target, product=product, config=config, imaging_method=imaging_method,
+            directory=imaging_dir)
 
-        imaging_dir = self._kh.get_imaging_dir_for_target(target)
-        has_imaging = os.path.isdir(imaging_dir + fname_dict['orig'])
+        has_imaging = self._has_imaging_file(fname_dict['orig'])
         has_singledish = self._kh.has_singledish(target=target, product=product)
         is_part_of_mosaic = self._kh.is_target_in_mosaic(target)
 
         if not has_imaging:
-            logger.warning("No imaging for "+fname_dict['orig']+". Returning.")
+            logger.warning("No imaging for %s. Returning.", fname_dict['orig'])
             return()
 
+        # Decide once which of the optional steps apply
+
+        do_singledish = has_singledish and imaging_method != 'sdintimaging'
+        do_singledish_weight = is_part_of_mosaic and do_singledish
+
         # Call tasks
 
         self.task_stage_interf_data(
@@ -1555,7 +1723,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
             imaging_method=imaging_method
             )
 
-        if has_singledish and imaging_method not in ['sdintimaging']:
+        if do_singledish:
             self.task_stage_singledish(
                 target=target, config=config, product=product,
                 check_files=check_files
@@ -1568,7 +1736,7 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                 imaging_method=imaging_method
                 )
 
-        if is_part_of_mosaic and has_singledish and imaging_method not in ['sdintimaging']:
+        if do_singledish_weight:
             self.task_make_singledish_weight(
                 target=target, config=config, product=product,
                 check_files=check_files,
@@ -1604,35 +1772,29 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
         if imaging_method == 'sdintimaging':
             has_imaging = False
             for mosaic_part in mosaic_parts:
+                imaging_dir = self._kh.get_imaging_dir_for_target(mosaic_part)
                 fname_dict = self._fname_dict(
                     target=mosaic_part, product=product, config=config,
-                    imaging_method=imaging_method)
-                imaging_dir = self._kh.get_imaging_dir_for_target(mosaic_part)
-                has_imaging = os.path.isdir(imaging_dir + fname_dict['orig'])
+                    imaging_method=imaging_method, directory=imaging_dir)
+                has_imaging = self._has_imaging_file(fname_dict['orig'])
                 if has_imaging:
                     break
             if not has_imaging:
                 imaging_method = 'tclean'
 
-        # Check if the individual parts have single dish data. If they
-        # do, flip the single dish flag to true.
-
-        parts_have_singledish = False
-
-        for this_part in mosaic_parts:
-
-            this_part_has_sd = self._kh.has_singledish(target=this_part, product=product)
-
-            if this_part_has_sd:
-                parts_have_singledish = True
-
-        # Check if this is a feather configuration. If so, then flip
-        # the single dish flag to false. This overrides the presence
+        # Check if this is a feather configuration. If so, then the
+        # single dish flag stays false. This overrides the presence
         # of data - we don't treat the singledish for feathered data.
 
-        if config in self.get_feather_configs() or imaging_method in ['sdintimaging']:
+        skip_singledish = (config in self.get_feather_configs()) or \
+            (imaging_method == 'sdintimaging')
+
+        # Otherwise check if any of the individual parts have single
+        # dish data. If they do, flip the single dish flag to true.
 
-            parts_have_singledish = False
+        parts_have_singledish = (not skip_singledish) and \
+            any(self._kh.has_singledish(target=this_part, product=product)
+                for this_part in mosaic_parts)
 
         self.task_convolve_parts_for_mosaic(
             target = target,
@@ -1775,82 +1937,57 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
 
 #region Loops
 
-    def loop_postprocess(
+    def _prep_one_target(
         self,
-        imaging_method='tclean',
-        do_all=False,
-        do_prep=False,
-        do_feather=False,
-        do_mosaic=False,
-        do_cleanup=False,
-        do_summarize=False,
-        trim_coarse_beam_edge_channels=False,
-        feather_apod=False,
-        feather_noapod=False,
-        feather_before_mosaic=False,
-        feather_after_mosaic=False,
-        make_directories=True,
+        this_target,
+        prep_dict = None,
+        imaging_method = 'tclean',
+        trim_coarse_beam_edge_channels = False,
         ):
         """
-        Loops over the full set of targets, products, and
-        configurations to run the postprocessing. Toggle the parts of
-        the loop using the do_XXX booleans. Other choices affect the
-        algorithms used.
+        Run recipe_prep_one_target for each (product, config) of one
+        target in prep_dict that has imaging. Called by
+        loop_postprocess, possibly in a worker process.
         """
 
-        if do_all:
-            do_prep = True
-            do_feather=True
-            do_mosaic=True
-            do_cleanup=True
-            do_summarize=True
-
-        if feather_apod is False and feather_noapod is False:
-            logger.info("Defaulting to no apodization.")
-            feather_noapod = True
+        # Local aliases for the lookups made on every iteration
 
-        if len(self.get_targets()) == 0:
-            logger.error("Need a target list.")
-            return(None)
-
-        if len(self.get_all_products()) == 0:
-            logger.error("Need a products list.")
-            return(None)
-
-        if make_directories:
-            self._kh.make_missing_directories(postprocess=True)
+        kh = self._kh
+        fname_dict_for = self._fname_dict
+        has_imaging_file = self._has_imaging_file
 
-        # Prepare the interferometer data that has imaging for further
-        # postprocessing. Includes staging the single dish data,
-        # making weights, etc. These are in the recipe_prep_one_target
+        # Share the staged single dish data between the configs of
+        # this target. Remove the staged copies and drop the cache
+        # however the loop ends, so that a failure neither leaves the
+        # copies behind nor hands a stale cache to later calls.
 
-        if do_prep:
+        self._sd_stage_cache = {}
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,do_products=True,do_configs=True):
+        try:
+            for this_product, this_config in prep_dict[this_target]:
 
                 has_imaging = False
+                imaging_dir = kh.get_imaging_dir_for_target(this_target)
 
                 if imaging_method == 'sdintimaging':
-                    fname_dict = self._fname_dict(
+                    fname_dict = fname_dict_for(
                         target=this_target, product=this_product, config=this_config,
-                        imaging_method=imaging_method)
-                    imaging_dir = self._kh.get_imaging_dir_for_target(this_target)
-                    has_imaging = os.path.isdir(imaging_dir + fname_dict['orig'])
+                        imaging_method=imaging_method, directory=imaging_dir)
+                    has_imaging = has_imaging_file(fname_dict['orig'])
                     if has_imaging:
                         imaging_method_prep = 'sdintimaging'
 
                 if not has_imaging:
-                    fname_dict = self._fname_dict(
-                        target=this_target, product=this_product, config=this_config)
-                    imaging_dir = self._kh.get_imaging_dir_for_target(this_target)
-                    has_imaging = os.path.isdir(imaging_dir + fname_dict['orig'])
+                    fname_dict = fname_dict_for(
+                        target=this_target, product=this_product, config=this_config,
+                        directory=imaging_dir)
+                    has_imaging = has_imaging_file(fname_dict['orig'])
                     if has_imaging:
                         imaging_method_prep = 'tclean'
 
                 if not has_imaging:
-                    logger.debug("Skipping "+this_target+" because it lacks imaging.")
-                    logger.debug(imaging_dir+fname_dict['orig'])
+                    logger.debug("Skipping %s because it lacks imaging.", this_target)
+                    logger.debug("%s", fname_dict['orig'])
                     continue
 
                 self.recipe_prep_one_target(
@@ -1859,165 +1996,392 @@ class PostProcessHandler(handlerTemplate.HandlerTemplate):
                     trim_coarse_beam_edge_channels = trim_coarse_beam_edge_channels, 
                     imaging_method = imaging_method_prep)
 
-        # Feather the interferometer configuration data that has
-        # single dish imaging. We'll return to feather mosaicked
-        # intereferometer and single dish data in the next steps.
+        finally:
+            for staged_sd in self._sd_stage_cache.values():
+                os.system('rm -rf '+staged_sd)
+            self._sd_stage_cache = None
 
-        if do_feather:
+        return()
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,do_products=True,do_configs=True,just_interf=True):
+    def _feather_one_target(
+        self,
+        this_target,
+        feather_dict = None,
+        imaging_method = 'tclean',
+        feather_apod = False,
+        feather_noapod = True,
+        feather_before_mosaic = False,
+        ):
+        """
+        Feather each (product, config) of one target in feather_dict
+        that has interferometer imaging and single dish data. Called
+        by loop_postprocess, possibly in a worker process.
+        """
 
-                if imaging_method == 'sdintimaging':
-                    fname_dict = self._fname_dict(
-                        target=this_target, product=this_product, config=this_config,
-                        imaging_method=imaging_method)
-                    imaging_dir = self._kh.get_imaging_dir_for_target(this_target)
-                    using_sdint = os.path.isdir(imaging_dir + fname_dict['orig'])
-                    if using_sdint:
-                        logger.debug('Skipping feathering for %s, %s, %s because using sdintimaging' %
-                                     (this_target, this_product, this_config))
-                        continue
+        # Local aliases for the lookups made on every iteration
 
-                fname_dict = self._fname_dict(
-                    target=this_target, product=this_product, config=this_config)
+        kh = self._kh
+        fname_dict_for = self._fname_dict
+        has_imaging_file = self._has_imaging_file
 
-                imaging_dir = self._kh.get_imaging_dir_for_target(this_target)
-                has_imaging = os.path.isdir(imaging_dir + fname_dict['orig'])
-                has_singledish = self._kh.has_singledish(target=this_target, product=this_product)
+        # Cheap key lookups first, so that skipped targets do not
+        # touch the file system.
 
-                is_part_of_mosaic = self._kh.is_target_in_mosaic(this_target)
-                if is_part_of_mosaic and not feather_before_mosaic:
-                    logger.debug("Skipping "+this_target+" because feather_before_mosaic is False.")
-                    continue
+        is_part_of_mosaic = kh.is_target_in_mosaic(this_target)
+        if is_part_of_mosaic and not feather_before_mosaic:
+            logger.debug("Skipping %s because feather_before_mosaic is False.", this_target)
+            return()
 
-                if not has_imaging:
-                    logger.debug("Skipping "+this_target+" because it lacks imaging.")
-                    logger.debug(imaging_dir+fname_dict['orig'])
-                    continue
+        imaging_dir = kh.get_imaging_dir_for_target(this_target)
+        using_sdint_method = (imaging_method == 'sdintimaging')
 
-                if not has_singledish:
-                    logger.debug("Skipping "+this_target+" because it lacks single dish.")
-                    continue
+        # The feather variants do not change between products and
+        # configs, so settle them before the loop.
 
-                if feather_apod:
-                    self.task_feather(
-                        target = this_target, product = this_product, config = this_config,
-                        apodize=True, apod_ext='pb',extra_ext_out='_apod',check_files=True,
-                        copy_weights=True,
-                        )
+        feather_variants = []
+        if feather_apod:
+            feather_variants.append(dict(
+                apodize=True, apod_ext='pb', extra_ext_out='_apod'))
+        if feather_noapod:
+            feather_variants.append(dict(
+                apodize=False, extra_ext_out=''))
 
-                if feather_noapod:
-                    self.task_feather(
-                        target = this_target, product = this_product, config = this_config,
-                        apodize=False, extra_ext_out='',check_files=True,
-                        copy_weights=True,
-                        )
-
-        # Mosaic the interferometer, single dish, and feathered data.
+        for this_product, this_config in feather_dict.get(this_target, []):
 
-        if do_mosaic:
+            has_singledish = kh.has_singledish(target=this_target, product=this_product)
+            if not has_singledish:
+                logger.debug("Skipping %s because it lacks single dish.", this_target)
+                continue
 
-            # Loop over interferometer configurations
+            if using_sdint_method:
+                fname_dict = fname_dict_for(
+                    target=this_target, product=this_product, config=this_config,
+                    imaging_method=imaging_method, directory=imaging_dir)
+                using_sdint = has_imaging_file(fname_dict['orig'])
+                if using_sdint:
+                    logger.debug('Skipping feathering for %s, %s, %s because using sdintimaging',
+                                 this_target, this_product, this_config)
+                    continue
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,do_products=True,do_configs=True,just_interf=True):
+            fname_dict = fname_dict_for(
+                target=this_target, product=this_product, config=this_config,
+                directory=imaging_dir)
 
-                is_mosaic = self._kh.is_target_linmos(this_target)
-                if not is_mosaic:
-                    continue
+            has_imaging = has_imaging_file(fname_dict['orig'])
 
-                # Mosaic the interferometer data and the
-                # single dish data (need to verify if parts
-                # have single dish, enforce the same
-                # astrometric grid).
+            if not has_imaging:
+                logger.debug("Skipping %s because it lacks imaging.", this_target)
+                logger.debug("%s", fname_dict['orig'])
+                continue
 
-                self.recipe_mosaic_one_target(
+            for this_variant in feather_variants:
+                self.task_feather(
                     target = this_target, product = this_product, config = this_config,
-                    check_files = True,
-                    imaging_method=imaging_method,
-                    extra_ext_in = '',
-                    extra_ext_out = '',
+                    check_files=True, copy_weights=True,
+                    **this_variant
                     )
 
-            # Loop over feather configurations
+        return()
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,do_products=True,do_configs=True,just_feather=True):
+    def _cleanup_one_target(
+        self,
+        this_target,
+        cleanup_dict = None,
+        imaging_method = 'tclean',
+        ):
+        """
+        Run recipe_cleanup_one_target for each (product, config) of
+        one target in cleanup_dict. Called by loop_postprocess,
+        possibly in a worker process.
+        """
 
-                # Mosaic the previously feathered data.
+        using_sdint_method = (imaging_method == 'sdintimaging')
 
-                if feather_apod:
-                    self.recipe_mosaic_one_target(
-                        target = this_target, product = this_product, config = this_config,
-                        check_files = True,
-                        extra_ext_in = '_apod',
-                        extra_ext_out = '_prefeather_apod',
-                        )
+        for this_product, this_config in cleanup_dict[this_target]:
+
+            # At this point, if using sdintimaging rename all the
+            # interf config files to their associated feathered config
+            # files
+
+            if using_sdint_method:
+
+                self.task_rename_sdintimaging(target=this_target, product=this_product, config=this_config,
+                                              imaging_method=imaging_method)
+
+            self.recipe_cleanup_one_target(
+                target = this_target,
+                product = this_product,
+                config = this_config,
+                check_files = True)
+
+        return()
+
+    def _postprocess_one_target(
+        self,
+        this_target,
+        step_calls = (),
+        ):
+        """
+        Run the per-target steps in step_calls in order for one
+        target. Each entry is a callable that takes the target name,
+        bound to its arguments once by loop_postprocess, so only the
+        enabled steps are visited. Called by loop_postprocess,
+        possibly in a worker process.
+        """
+
+        for this_call in step_calls:
+            this_call(this_target)
+
+        return()
+
+    def loop_postprocess(
+        self,
+        imaging_method='tclean',
+        do_all=False,
+        do_prep=False,
+        do_feather=False,
+        do_mosaic=False,
+        do_cleanup=False,
+        do_summarize=False,
+        trim_coarse_beam_edge_channels=False,
+        feather_apod=False,
+        feather_noapod=False,
+        feather_before_mosaic=False,
+        feather_after_mosaic=False,
+        make_directories=True,
+        ):
+        """
+        Loops over the full set of targets, products, and
+        configurations to run the postprocessing. Toggle the parts of
+        the loop using the do_XXX booleans. Other choices affect the
+        algorithms used.
+        """
+
+        if do_all:
+            do_prep = True
+            do_feather=True
+            do_mosaic=True
+            do_cleanup=True
+            do_summarize=True
+
+        # Nothing to do (summarizing is not implemented yet), so do
+        # not walk the targets at all.
+
+        if not (do_prep or do_feather or do_mosaic or do_cleanup):
+            logger.info("No postprocessing steps selected.")
+            return(None)
+
+        if feather_apod is False and feather_noapod is False:
+            logger.info("Defaulting to no apodization.")
+            feather_noapod = True
+
+        if len(self.get_targets()) == 0:
+            logger.error("Need a target list.")
+            return(None)
+
+        if len(self.get_all_products()) == 0:
+            logger.error("Need a products list.")
+            return(None)
+
+        if make_directories:
+            self._kh.make_missing_directories(postprocess=True)
+
+        # Imaging products do not change while we run, so only look
+        # for each of them once.
+
+        self._isdir_cache = {}
+
+        # Drop the cache however the loop ends, so that a failed run
+        # does not leave stale results on the handler.
+
+        try:
+            kh = self._kh
+
+            # Walk the (target, product, config) plan once and split it by
+            # target. All configs are prepped and cleaned up, only the
+            # interferometric ones are feathered.
+
+            prep_dict = {}
+            feather_dict = {}
+            for this_entry in self._plan:
+                prep_dict.setdefault(this_entry.target, []).append(
+                    (this_entry.product, this_entry.config))
+                if this_entry.ctype == 'interf':
+                    feather_dict.setdefault(this_entry.target, []).append(
+                        (this_entry.product, this_entry.config))
+
+            # Targets that neither are a mosaic nor feed one do not depend
+            # on any other target. Run all of their steps back-to-back in a
+            # single pass (in parallel, see set_max_workers) so each cube
+            # is handled while its files are fresh.
+
+            standalone_targets = []
+            linked_targets = []
+            linmos_targets = set()
+            for this_target in prep_dict:
+                if kh.is_target_linmos(this_target):
+                    linmos_targets.add(this_target)
+                    linked_targets.append(this_target)
+                elif kh.is_target_in_mosaic(this_target):
+                    linked_targets.append(this_target)
+                else:
+                    standalone_targets.append(this_target)
+
+            # The mosaic steps only act on mosaics, so pick those entries
+            # out of the plan once for all of them.
+
+            linmos_plan = [this_entry for this_entry in self._plan
+                           if this_entry.target in linmos_targets]
+
+            # Per-target steps in the order they run, with the arguments
+            # for each.
+
+            step_kwargs = {
+                # Prepare the interferometer data that has imaging for
+                # further postprocessing. Includes staging the single dish
+                # data, making weights, etc. These are in the
+                # recipe_prep_one_target
+                'prep':dict(
+                    prep_dict=prep_dict,
+                    imaging_method=imaging_method,
+                    trim_coarse_beam_edge_channels=trim_coarse_beam_edge_channels),
+                # Feather the interferometer configuration data that has
+                # single dish imaging. Mosaicked data are feathered after
+                # the mosaic step below.
+                'feather':dict(
+                    feather_dict=feather_dict,
+                    imaging_method=imaging_method,
+                    feather_apod=feather_apod,
+                    feather_noapod=feather_noapod,
+                    feather_before_mosaic=feather_before_mosaic),
+                # Trim and downsample the data, convert to Kelvin, etc.
+                'cleanup':dict(
+                    cleanup_dict=prep_dict,
+                    imaging_method=imaging_method),
+                }
+
+            step_funcs = {
+                'prep':self._prep_one_target,
+                'feather':self._feather_one_target,
+                'cleanup':self._cleanup_one_target,
+                }
+
+            # Bind the enabled steps to their arguments once, rather than
+            # looking them up and checking the flags for every target.
+
+            step_calls = dict(
+                (this_step, partial(step_funcs[this_step], **step_kwargs[this_step]))
+                for this_step, this_flag in
+                (('prep', do_prep), ('feather', do_feather), ('cleanup', do_cleanup))
+                if this_flag)
+
+            self._map_over_targets(
+                partial(self._postprocess_one_target,
+                        step_calls=tuple(step_calls.values())),
+                standalone_targets)
+
+            # The rest go step by step, so that mosaics see all of their
+            # parts. Each step's pool finishes before the next starts.
+
+            for this_step in ('prep', 'feather'):
+                if this_step in step_calls:
+                    self._map_over_targets(
+                        partial(self._postprocess_one_target,
+                                step_calls=(step_calls[this_step],)),
+                        linked_targets)
+
+            # Mosaic the interferometer, single dish, and feathered data.
+
+            if do_mosaic:
+
+                # Loop over interferometer configurations
+
+                for this_target, this_product, this_config, this_ctype in linmos_plan:
+
+                    if this_ctype != 'interf':
+                        continue
+
+                    # Mosaic the interferometer data and the
+                    # single dish data (need to verify if parts
+                    # have single dish, enforce the same
+                    # astrometric grid).
 
-                if feather_noapod:
                     self.recipe_mosaic_one_target(
                         target = this_target, product = this_product, config = this_config,
                         check_files = True,
+                        imaging_method=imaging_method,
                         extra_ext_in = '',
-                        extra_ext_out = '_prefeather',
+                        extra_ext_out = '',
                         )
 
-        # This round of feathering targets only mosaicked data. All
-        # other data have been feathered above already.
+                # Loop over feather configurations
 
-        if do_feather:
+                for this_target, this_product, this_config, this_ctype in linmos_plan:
 
-            # N.B. if using sdintimaging this will just crash out since it hasn't staged any singledish. This is
-            # intended!
+                    if this_ctype != 'feather':
+                        continue
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,do_products=True,do_configs=True,just_interf=True):
+                    # Mosaic the previously feathered data.
 
-                is_mosaic = self._kh.is_target_linmos(this_target)
-                if not is_mosaic:
-                    continue
+                    if feather_apod:
+                        self.recipe_mosaic_one_target(
+                            target = this_target, product = this_product, config = this_config,
+                            check_files = True,
+                            extra_ext_in = '_apod',
+                            extra_ext_out = '_prefeather_apod',
+                            )
 
-                if feather_apod:
-                    self.task_feather(
-                        target = this_target, product = this_product, config = this_config,
-                        apodize=True, apod_ext='pb',extra_ext_out='_apod',check_files=True,
-                        )
+                    if feather_noapod:
+                        self.recipe_mosaic_one_target(
+                            target = this_target, product = this_product, config = this_config,
+                            check_files = True,
+                            extra_ext_in = '',
+                            extra_ext_out = '_prefeather',
+                            )
 
-                if feather_noapod:
-                    self.task_feather(
-                        target = this_target, product = this_product, config = this_config,
-                        apodize=False, extra_ext_out='',check_files=True,
-                        )
+            # This round of feathering targets only mosaicked data. All
+            # other data have been feathered above already.
 
-        # Trim and downsample the data, convert to Kelvin, etc.
+            if do_feather:
 
-        if do_cleanup:
+                # N.B. if using sdintimaging this will just crash out since it hasn't staged any singledish. This is
+                # intended!
 
-            for this_target, this_product, this_config in \
-                    self.looper(do_targets=True,
-                                do_products=True,
-                                do_configs=True):
+                for this_target, this_product, this_config, this_ctype in linmos_plan:
 
-                # At this point, if using sdintimaging rename all the interf config files to their associated feathered
-                # config files
+                    if this_ctype != 'interf':
+                        continue
 
-                if imaging_method == 'sdintimaging':
+                    if feather_apod:
+                        self.task_feather(
+                            target = this_target, product = this_product, config = this_config,
+                            apodize=True, apod_ext='pb',extra_ext_out='_apod',check_files=True,
+                            )
+
+                    if feather_noapod:
+                        self.task_feather(
+                            target = this_target, product = this_product, config = this_config,
+                            apodize=False, extra_ext_out='',check_files=True,
+                            )
+
+            # Clean up the mosaics and their parts last.
+
+            if 'cleanup' in step_calls:
+                self._map_over_targets(
+                    partial(self._postprocess_one_target,
+                            step_calls=(step_calls['cleanup'],)),
+                    linked_targets)
 
-                    self.task_rename_sdintimaging(target=this_target, product=this_product, config=this_config,
-                                                  imaging_method=imaging_method)
+            # Build reports summarizing the properties of the final
+            # postprocessed data.
 
-                self.recipe_cleanup_one_target(
-                    target = this_target,
-                    product = this_product,
-                    config = this_config,
-                    check_files = True)
+            if do_summarize:
 
-        # Build reports summarizing the properties of the final
-        # postprocessed data.
+                pass
 
-        if do_summarize:
+        finally:
+            self._isdir_cache = None
 
-            pass
+        return(None)
 
 #endregion
@@ -7,12 +7,29 @@ handlers and includes basic list and shared functionality.
 
 import os
 import glob
+import itertools
+from collections import namedtuple
+from contextlib import contextmanager
+import multiprocessing
 import numpy as np
 
+# concurrent.futures is not available under Python 2 (CASA 5 and
+# earlier). Loops then always run one target at a time.
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    has_futures = True
+except ImportError:
+    has_futures = False
+
 import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# One (target, product, config) combination to loop over. ctype is
+# 'interf' or 'feather'.
+PlanEntry = namedtuple('PlanEntry', 'target product config ctype')
+
 class HandlerTemplate:
     """
     Template handler class inherited by specific handler objects.
@@ -47,6 +64,12 @@ class HandlerTemplate:
         self._interf_configs_list = []
         self._feather_configs_list = []
         self._singledish_configs_list = []
+        self._full_configs = ()
+        self._plan = []
+
+        # Set while inside batch_updates, which defers list building
+        self._build_paused = False
+        self._build_dirty = False
 
         # Initialize switches on config types
         self._no_interf = False
@@ -76,6 +99,9 @@ class HandlerTemplate:
         # Toggle whether tasks are executed
         self.set_dry_run(dry_run)
 
+        # Process one target at a time by default
+        self.set_max_workers(1)
+
 #region Parameter toggles
 
     ##########################################
@@ -92,6 +118,8 @@ class HandlerTemplate:
         lists, etc.
         """
         self._kh = key_handler
+        if hasattr(self._kh, 'clear_lookup_cache'):
+            self._kh.clear_lookup_cache()
         if not nobuild:
             self._build_lists()
         return(None)
@@ -107,6 +135,28 @@ class HandlerTemplate:
         self._dry_run = dry_run
         return(None)
 
+    def set_max_workers(
+        self,
+        max_workers = 1):
+        """
+        Set how many targets are processed at once by loops that
+        support it. Targets are independent, so these run in separate
+        processes. None picks half the available cores. Dry runs always
+        go one target at a time. The postprocessing handler also uses
+        this many processes to convolve the parts of a mosaic, a step
+        that runs outside the target pool. The default of 1 keeps
+        everything serial, as does a Python without concurrent.futures.
+        """
+        if not has_futures:
+            if max_workers != 1:
+                logger.warning("concurrent.futures not available. Processing one target at a time.")
+            self._max_workers = 1
+            return(None)
+        if max_workers is None:
+            max_workers = max(1, multiprocessing.cpu_count()//2)
+        self._max_workers = max(1, int(max_workers))
+        return(None)
+
 #endregion
 
 #region List building routines
@@ -318,14 +368,75 @@ class HandlerTemplate:
         self._no_singledish = no_singledish
         self._build_lists()
 
+    def set_filters(
+        self,
+        **kwargs):
+        """
+        Set several selections at once and build the lists a single
+        time. Keywords are targets, line_products, cont_products,
+        interf_configs, feather_configs and singledish_configs, each
+        given a dictionary of arguments for the matching set_XXX
+        call, e.g., set_filters(targets={'only':['ngc0628']},
+        interf_configs={'skip':['7m']}).
+        """
+        setters = {
+            'targets':self.set_targets,
+            'line_products':self.set_line_products,
+            'cont_products':self.set_cont_products,
+            'interf_configs':self.set_interf_configs,
+            'feather_configs':self.set_feather_configs,
+            'singledish_configs':self.set_singledish_configs,
+            }
+
+        for this_key in kwargs:
+            if this_key not in setters:
+                logger.error("Unknown filter "+str(this_key)+". Valid filters are "+str(sorted(setters)))
+                return(None)
+
+        with self.batch_updates():
+            for this_key, this_kwargs in kwargs.items():
+                setters[this_key](**(this_kwargs or {}))
+
+        return(None)
+
+    @contextmanager
+    def batch_updates(
+        self):
+        """
+        Context manager that defers rebuilding the lists until the
+        block exits, so several set_XXX calls cost one rebuild:
+
+            with this_handler.batch_updates():
+                this_handler.set_targets(only=['ngc0628'])
+                this_handler.set_no_cont_products(True)
+        """
+        if self._build_paused:
+            # Already batching; the outer block does the rebuild.
+            yield
+            return
+
+        self._build_paused = True
+        try:
+            yield
+        finally:
+            self._build_paused = False
+            if self._build_dirty:
+                self._build_dirty = False
+                self._build_lists()
+
     def _build_lists(
         self
         ):
         """
         Build the lists of targets, mosaics, products, and
-        configurations to loop over when a loop is run.
+        configurations to loop over when a loop is run. Inside
+        batch_updates this only marks the lists as stale.
         """
 
+        if self._build_paused:
+            self._build_dirty = True
+            return()
+
         # Make sure there is an attached handlerKeys object.
         
         if self._kh is None:
@@ -380,6 +491,34 @@ class HandlerTemplate:
                 skip = self._singledish_configs_skip,
                 )
 
+        # (config, config type) pairs for the interferometric and
+        # feathered configs, shared by every target and product.
+        self._full_configs = \
+            tuple((this_config, 'interf') for this_config in
+                  (self._interf_configs_list or ())) + \
+            tuple((this_config, 'feather') for this_config in
+                  (self._feather_configs_list or ()))
+
+        self._build_plan()
+
+        return()
+
+    def _build_plan(
+        self
+        ):
+        """
+        Build the list of PlanEntry (target, product, config, config
+        type) combinations once, in loop order, so that loops over all
+        three just walk it.
+        """
+
+        self._plan = [
+            PlanEntry(this_target, this_product, this_config, this_ctype)
+            for this_target, this_product, (this_config, this_ctype) in
+            itertools.product(self._targets_list or (),
+                              self.get_all_products(),
+                              self._full_configs)]
+
         return()
 
 #endregion
@@ -430,14 +569,8 @@ class HandlerTemplate:
         Get a combined list of line and continuum products to be
         considered.
         """
-
-        if len(self.get_cont_products()) is 0:
-            return(self.get_line_products())
-
-        if len(self.get_line_products()) is 0:
-            return(self.get_cont_products())
-        
-        return(self.get_line_products() + self.get_cont_products())
+        return(list(self._line_products_list or ()) +
+               list(self._cont_products_list or ()))
 
     def get_interf_configs(
         self
@@ -479,15 +612,10 @@ class HandlerTemplate:
         Get a combined list of feather and interferometric configs to
         consider.
         """
-        all_configs = []
-        if self.get_interf_configs() is not None and not self._no_interf:
-            if len(self.get_interf_configs()) > 0:
-                all_configs.extend(self.get_interf_configs())
+        all_configs = list(itertools.chain(
+            () if self._no_interf else self.get_interf_configs(),
+            () if self._no_feather else self.get_feather_configs()))
 
-        if self.get_feather_configs() is not None and not self._no_feather:
-            if len(self.get_feather_configs()) > 0:
-                all_configs.extend(self.get_feather_configs())
-        
         if len(all_configs) == 0:
             all_configs = None
         
@@ -538,7 +666,24 @@ class HandlerTemplate:
         if just_singledish:
             config_list = self.get_singledish_configs()      
 
-        # All three quantities
+        # All three quantities. The common cases come straight from
+        # the prebuilt plan.
+
+        if do_targets and do_products and do_configs and \
+                not (just_line or just_cont or just_singledish) and \
+                not (just_interf and just_feather) and \
+                config_list is not None:
+            logger.info("Looping over target, product, and config.")
+            if just_interf:
+                use_ctype = 'interf'
+            elif just_feather:
+                use_ctype = 'feather'
+            else:
+                use_ctype = None
+            for this_entry in self._plan:
+                if (use_ctype is None) or (this_entry.ctype == use_ctype):
+                    yield this_entry.target, this_entry.product, this_entry.config
+            return
 
         if do_targets and do_products and do_configs:
             logger.info("Looping over target, product, and config.")
@@ -584,4 +729,51 @@ class HandlerTemplate:
             for this_product in product_list:
                 yield this_product
 
+    def _map_over_targets(
+        self,
+        func,
+        target_list,
+        ):
+        """
+        Call func(target) for each target. Uses a process pool of
+        set_max_workers processes when more than one is allowed and
+        this is not a dry run. If the pool cannot start or its workers
+        die, the targets that did not finish run serially. Errors
+        raised by func itself are passed on.
+        """
+
+        target_list = list(target_list)
+        n_workers = min(self._max_workers, len(target_list))
+
+        done = set()
+        if (n_workers > 1) and (not self._dry_run) and has_futures:
+            try:
+                executor = ProcessPoolExecutor(max_workers=n_workers)
+            except (OSError, NotImplementedError) as exc:
+                logger.warning("Could not start a process pool ("+str(exc)+"). Running serially.")
+                executor = None
+
+            if executor is not None:
+                with executor:
+                    futures = {}
+                    try:
+                        for this_target in target_list:
+                            futures[executor.submit(func, this_target)] = this_target
+                    except (OSError, BrokenProcessPool) as exc:
+                        logger.warning("Process pool failed to start workers ("+str(exc)+"). Running the rest serially.")
+                    for this_future in as_completed(futures):
+                        try:
+                            this_future.result()
+                        except BrokenProcessPool as exc:
+                            logger.warning("Process pool failed on "+futures[this_future]+" ("+str(exc)+"). Will run it serially.")
+                            continue
+                        done.add(futures[this_future])
+
+        for this_target in target_list:
+            if this_target in done:
+                continue
+            func(this_target)
+
+        return(None)
+
 #endregion
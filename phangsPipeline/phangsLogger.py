@@ -21,7 +21,12 @@ def setup_logger(level='INFO',logfile=None):
     if level == 'CRITICAL':
         level_value = logging.CRITICAL
 
-    root.handlers = []
+    # Write out anything still pending in the previous handlers (e.g.,
+    # from an earlier call) before replacing them.
+    for this_handler in list(root.handlers):
+        this_handler.flush()
+        this_handler.close()
+        root.removeHandler(this_handler)
 
     screen_handler = logging.StreamHandler(sys.stdout)
     screen_handler.setLevel(level_value)
@@ -29,8 +34,14 @@ def setup_logger(level='INFO',logfile=None):
 
     root.addHandler(screen_handler)
 
+    # Records go straight to the file, unbuffered, so that the log is
+    # complete up to the last record even if CASA crashes the process.
     if logfile is not None:
-        print("Logging to file not implemented yet.")
+        file_handler = logging.FileHandler(logfile)
+        file_handler.setLevel(level_value)
+        file_handler.setFormatter(logging.Formatter(file_log_format))
+
+        root.addHandler(file_handler)
 
     return()
     
@@ -46,7 +46,40 @@ def get_cube_filename(target=None, config=None, product=None,
         logging.error("Config needs to be a string.", config)
         return(None)
     
-    filename = target+'_'+config+'_'+product
+    return(_finish_cube_filename(target+'_'+config+'_'+product,
+                                 ext=ext, casa=casa, casaext=casaext))
+
+def get_cube_filenames(target=None, config=None, product=None,
+                       spec=()):
+    """
+    Get many data cube file names for one target, config, and product
+    at once. spec is a sequence of (tag, ext, casa, casaext) tuples,
+    with ext, casa, and casaext as in get_cube_filename. Returns a
+    dictionary of file names keyed by tag, or None on bad input.
+    """
+
+    # Check the shared arguments once rather than once per file
+
+    first_name = get_cube_filename(
+        target=target, config=config, product=product)
+    if first_name is None:
+        return(None)
+
+    base = target+'_'+config+'_'+product
+
+    fname_dict = {}
+    for tag, ext, casa, casaext in spec:
+        fname_dict[tag] = _finish_cube_filename(
+            base, ext=ext, casa=casa, casaext=casaext)
+    return(fname_dict)
+
+def _finish_cube_filename(base, ext=None, casa=False, casaext='.image'):
+    """
+    Append the extension and suffix to the target_config_product base
+    of a cube file name.
+    """
+
+    filename = base
     if ext is not None:
         if type(ext) is not type(''):
             logging.error("Ext needs to be a string or None.", ext)
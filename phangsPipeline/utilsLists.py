@@ -18,6 +18,25 @@ def select_from_list(
 
     sorted_list = sorted(master_list,key=lambda s: s.lower())
 
+    # Build the skip and only sets once rather than scanning the lists
+    # for every element. Loose matching ignores case.
+
+    if skip is not None and len(skip) > 0:
+        if loose:
+            skip_set = frozenset(this_skip.lower() for this_skip in skip)
+        else:
+            skip_set = frozenset(skip)
+    else:
+        skip_set = None
+
+    if only is not None and len(only) > 0:
+        if loose:
+            only_set = frozenset(this_only.lower() for this_only in only)
+        else:
+            only_set = frozenset(only)
+    else:
+        only_set = None
+
     sub_list = []
 
     if first is not None:
@@ -51,31 +70,18 @@ def select_from_list(
         if after_last:
             continue
 
-        if skip is not None:
-            if len(skip) > 0:
-                match = False
-                if loose:
-                    for this_skip in skip:
-                        if element.lower() == this_skip.lower():
-                            match = True                        
-                else:
-                    if element in skip:
-                        match = True
-                if match:
-                    continue
-
-        if only is not None:
-            if len(only) > 0:
-                match = False
-                if loose:
-                    for this_only in only:
-                        if element.lower() == this_only.lower():
-                            match = True                        
-                else:
-                    if element in only:
-                        match = True
-                if not match:
-                    continue
+        if loose:
+            match_key = element.lower()
+        else:
+            match_key = element
+
+        if skip_set is not None:
+            if match_key in skip_set:
+                continue
+
+        if only_set is not None:
+            if match_key not in only_set:
+                continue
             
         sub_list.append(element)
 
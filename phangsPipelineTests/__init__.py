@@ -4,12 +4,20 @@ from .test_casaCubeRoutines import TestingCasaCubeRoutines
 from .test_casaCubeRoutines import TestingCasaCubeRoutinesInCasa
 from .test_casaFeatherRoutines import TestingCasaFeatherRoutines
 from .test_casaFeatherRoutines import TestingCasaFeatherRoutinesInCasa
+from .test_casaMaskingRoutines import TestingCasaMaskingRoutines
+from .test_casaMaskingRoutines import TestingCasaMaskingRoutinesInCasa
 from .test_handlerKeys import TestingHandlerKeys
 from .test_handlerKeys import TestingHandlerKeysInCasa
 from .test_handlerVis import TestingHandlerVis
 from .test_handlerVis import TestingHandlerVisInCasa
 from .test_handlerImaging import TestingHandlerImaging
 from .test_handlerImaging import TestingHandlerImagingInCasa
+from .test_handlerPostprocess import TestingHandlerPostprocess
+from .test_handlerPostprocess import TestingHandlerPostprocessInCasa
+from .test_handlerTemplate import TestingHandlerTemplate
+from .test_handlerTemplate import TestingHandlerTemplateInCasa
+from .test_utilsLists import TestingUtilsLists
+from .test_utilsLists import TestingUtilsListsInCasa
 
 import phangsPipeline
 import unittest
@@ -33,9 +41,13 @@ class TestingAllInCasa():
         testsuite.addTest(unittest.makeSuite(TestingPipelineLogger))
         testsuite.addTest(unittest.makeSuite(TestingCasaCubeRoutines))
         testsuite.addTest(unittest.makeSuite(TestingCasaFeatherRoutines))
+        testsuite.addTest(unittest.makeSuite(TestingCasaMaskingRoutines))
         testsuite.addTest(unittest.makeSuite(TestingHandlerKeys))
         testsuite.addTest(unittest.makeSuite(TestingHandlerVis))
         testsuite.addTest(unittest.makeSuite(TestingHandlerImaging))
+        testsuite.addTest(unittest.makeSuite(TestingHandlerPostprocess))
+        testsuite.addTest(unittest.makeSuite(TestingHandlerTemplate))
+        testsuite.addTest(unittest.makeSuite(TestingUtilsLists))
         return testsuite
     
     def run(self):
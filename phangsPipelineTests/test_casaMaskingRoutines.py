@@ -0,0 +1,330 @@
+"""
+How to run this test inside CASA:
+
+```
+sys.path.append('../casa_analysis_scripts')
+sys.path.append('../analysis_scripts')
+sys.path.append('.')
+import importlib
+#importlib.reload = reload
+import phangsPipeline
+importlib.reload(phangsPipeline)
+importlib.reload(phangsPipeline.casaMaskingRoutines)
+import phangsPipelineTests
+importlib.reload(phangsPipelineTests)
+importlib.reload(phangsPipelineTests.test_casaMaskingRoutines)
+phangsPipelineTests.TestingCasaMaskingRoutinesInCasa().run()
+```
+
+What will be tested:
+
+```
+mad
+estimate_noise
+_neighbor_or
+_grow_mask
+
+```
+"""
+
+import os, sys, shutil
+import unittest
+
+
+class TestingCasaMaskingRoutines(unittest.TestCase):
+    """docstring for TestingCasaMaskingRoutines"""
+
+    def __init__(self, *args, **kwargs):
+        super(TestingCasaMaskingRoutines, self).__init__(*args, **kwargs)
+        import phangsPipeline
+        self.current_dir = os.getcwd()
+        self.module_dir = os.path.dirname(os.path.abspath(phangsPipeline.__path__[0]))
+        self.working_dir = os.path.join(self.module_dir, 'phangsPipelineTests')
+
+    def make_noise(self, size, seed = 42):
+        import numpy as np
+        rng = np.random.RandomState(seed)
+        return rng.normal(0.0, 2.0, size).astype(np.float32)
+
+    def reference_mad(self, data):
+        import numpy as np
+        this_med = np.median(data)
+        return np.median(np.abs(data - this_med))
+
+    def without_numba(self, func, *args, **kwargs):
+        # Run func with the numpy fallbacks in casaMaskingRoutines.
+        from phangsPipeline import casaMaskingRoutines as cmr
+        saved = cmr.has_numba
+        cmr.has_numba = False
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cmr.has_numba = saved
+
+    def reference_chauvenet(self, data, niter, use_mad):
+        # Recompute the mean and standard deviation from scratch on
+        # every iteration.
+        import numpy as np
+        from scipy.special import erfc
+        data = np.asarray(data, dtype=np.float64)
+        for ii in range(niter):
+            this_mean = np.mean(data)
+            if use_mad:
+                this_std = self.reference_mad(data) / 0.6745
+            else:
+                this_std = np.std(data)
+            this_prob = erfc(np.abs(data - this_mean) / (this_std * np.sqrt(2.0)))
+            data = data[this_prob > 1.0 / (2.0 * data.size)]
+        return np.std(data)
+
+    def make_outliers(self):
+        import numpy as np
+        data = self.make_noise(20000)
+        data[::500] = 50.0
+        data[1::700] = -40.0
+        return data
+
+    def test_estimate_noise_chauvstd(self):
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_outliers()
+        expected = self.reference_chauvenet(data, 5, False)
+        self.assertAlmostEqual(
+            cmr.estimate_noise(data, method='chauvstd', niter=5),
+            expected, places=4)
+        self.assertAlmostEqual(
+            self.without_numba(cmr.estimate_noise, data,
+                               method='chauvstd', niter=5),
+            expected, places=4)
+
+    def test_estimate_noise_chauvmad(self):
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_outliers()
+        expected = self.reference_chauvenet(data, 3, True)
+        self.assertAlmostEqual(
+            cmr.estimate_noise(data, method='chauvmad', niter=3),
+            expected, places=4)
+        self.assertAlmostEqual(
+            self.without_numba(cmr.estimate_noise, data,
+                               method='chauvmad', niter=3),
+            expected, places=4)
+
+    def test_estimate_noise_mask(self):
+        # Masked and non-finite values are ignored and the caller's
+        # data are not modified.
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_outliers()
+        data[5] = np.nan
+        mask = np.ones(data.size, dtype=bool)
+        mask[:1000] = False
+        saved = data.copy()
+        expected = self.reference_chauvenet(
+            data[mask & np.isfinite(data)], 5, False)
+        self.assertAlmostEqual(
+            cmr.estimate_noise(data, mask=mask, method='chauvstd', niter=5),
+            expected, places=4)
+        self.assertTrue(np.array_equal(data, saved, equal_nan=True))
+
+    def test_mad_small(self):
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_noise(1001)
+        self.assertAlmostEqual(cmr.mad(data, as_sigma=False),
+                               self.reference_mad(data), places=5)
+
+    def test_mad_large_even(self):
+        # More than 1e5 samples takes the selection path. An even size
+        # checks that the two middle values are averaged.
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_noise(200000)
+        self.assertAlmostEqual(cmr.mad(data, as_sigma=False),
+                               self.reference_mad(data), places=5)
+
+    def test_median_in_place(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        for size in [1, 2, 7, 1000]:
+            data = self.make_noise(size)
+            self.assertAlmostEqual(cmr._median_in_place(data.copy()),
+                                   np.median(data), places=6)
+
+    def test_mad_large_without_numba(self):
+        # The partial-sort path used when numba is missing.
+        from phangsPipeline import casaMaskingRoutines as cmr
+        for size in [200000, 200001]:
+            data = self.make_noise(size)
+            saved = data.copy()
+            self.assertAlmostEqual(
+                self.without_numba(cmr.mad, data, as_sigma=False),
+                self.reference_mad(data), places=5)
+            self.assertTrue((data == saved).all())
+
+    def test_select_kth(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        if not cmr.has_numba:
+            self.skipTest('numba not available')
+        data = self.make_noise(50001)
+        # Repeated values land many points in the same bin.
+        ties = np.repeat(np.arange(10, dtype=np.float32), 1000)
+        for this_data in [data, ties]:
+            ordered = np.sort(this_data.astype(np.float64))
+            deviations = np.sort(np.abs(this_data.astype(np.float64) - 0.5))
+            for kk in [0, 1, this_data.size // 2, this_data.size - 1]:
+                self.assertEqual(
+                    cmr._select_kth(this_data, 0.0, False, kk, 64), ordered[kk])
+                self.assertAlmostEqual(
+                    cmr._select_kth(this_data, 0.5, True, kk, 64),
+                    deviations[kk], places=6)
+        # All values equal.
+        flat = np.ones(100, dtype=np.float32)
+        self.assertEqual(cmr._select_kth(flat, 0.0, False, 50, 64), 1.0)
+
+    def test_median_parallel(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        if not cmr.has_numba:
+            self.skipTest('numba not available')
+        for size in [1000, 1001]:
+            data = self.make_noise(size)
+            this_med = np.median(data.astype(np.float64))
+            self.assertAlmostEqual(
+                cmr._median_parallel(data, 0.0, False), this_med, places=6)
+            self.assertAlmostEqual(
+                cmr._median_parallel(data, this_med, True),
+                np.median(np.abs(data.astype(np.float64) - this_med)),
+                places=6)
+
+    def test_chauv_keep(self):
+        import numpy as np
+        from scipy.special import erfc
+        from phangsPipeline import casaMaskingRoutines as cmr
+        if not cmr.has_numba:
+            self.skipTest('numba not available')
+        data = self.make_outliers()
+        this_mean = float(np.mean(data, dtype=np.float64))
+        inv_std_sqrt2 = float(1.0 / (np.std(data, dtype=np.float64) * np.sqrt(2.0)))
+        crit = 1.0 / (2.0 * data.size)
+        keep = np.empty(data.size, dtype=np.bool_)
+        cmr._chauv_keep(data, this_mean, inv_std_sqrt2, crit, keep)
+        expected = erfc(np.abs(data - this_mean) * inv_std_sqrt2) > crit
+        self.assertTrue(np.array_equal(keep, expected))
+        self.assertFalse(keep[::500].any())
+
+    def test_sum_sumsq(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        if not cmr.has_numba:
+            self.skipTest('numba not available')
+        data = self.make_noise(10001)
+        sum_data, sum_sq = cmr._sum_sumsq(data)
+        as_double = data.astype(np.float64)
+        self.assertAlmostEqual(sum_data, np.sum(as_double), places=6)
+        self.assertAlmostEqual(sum_sq / np.dot(as_double, as_double), 1.0,
+                               places=10)
+
+    def test_mad_non_finite(self):
+        # NaN and inf give the same result as np.median, with or
+        # without numba.
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_noise(200001)
+        data[17] = np.nan
+        self.assertTrue(np.isnan(cmr.mad(data)))
+        self.assertTrue(np.isnan(self.without_numba(cmr.mad, data)))
+        data[17] = np.inf
+        self.assertEqual(cmr.mad(data, as_sigma=False), self.reference_mad(data))
+        self.assertEqual(self.without_numba(cmr.mad, data, as_sigma=False),
+                         self.reference_mad(data))
+
+    def test_mad_big_endian(self):
+        # Memory-mapped FITS planes are big-endian.
+        from phangsPipeline import casaMaskingRoutines as cmr
+        data = self.make_noise(200001)
+        swapped = data.astype('>f4')
+        self.assertAlmostEqual(cmr.mad(swapped, as_sigma=False),
+                               self.reference_mad(data), places=5)
+        self.assertAlmostEqual(cmr.mad(swapped[:1001], as_sigma=False),
+                               self.reference_mad(data[:1001]), places=5)
+
+    def reference_neighbor_or(self, mask, axis):
+        # Shift by one pixel each way along axis without wrapping.
+        import numpy as np
+        mask = np.moveaxis(mask.astype(bool), axis, -1)
+        out = mask.copy()
+        out[..., 1:] |= mask[..., :-1]
+        out[..., :-1] |= mask[..., 1:]
+        return np.moveaxis(out, -1, axis)
+
+    def test_neighbor_or(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        rng = np.random.RandomState(1)
+        mask = rng.uniform(size=(37, 29, 11, 1)) > 0.9
+        for axis in range(mask.ndim):
+            # A small block size forces several spatial tiles.
+            result = cmr._neighbor_or(mask, axis, block_bytes=64)
+            self.assertTrue(np.array_equal(
+                result, self.reference_neighbor_or(mask, axis)))
+        # The input is left alone.
+        self.assertTrue(np.array_equal(
+            mask, rng.__class__(1).uniform(size=mask.shape) > 0.9))
+
+    def test_neighbor_or_no_wrap(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        mask = np.zeros((4, 4, 6), dtype=bool)
+        mask[:, :, -1] = True
+        result = cmr._neighbor_or(mask, 2)
+        self.assertFalse(result[:, :, 0].any())
+        self.assertTrue(result[:, :, -2:].all())
+
+    def test_grow_mask(self):
+        import numpy as np
+        import scipy.ndimage as ndimage
+        from phangsPipeline import casaMaskingRoutines as cmr
+        rng = np.random.RandomState(2)
+        cube = ndimage.gaussian_filter(rng.normal(size=(30, 30, 20)), 1.5)
+        cube /= cube.std()
+        hi_mask = cube > 2.5
+        low_mask = cube > 1.0
+        expected = ndimage.binary_dilation(
+            hi_mask, mask=low_mask, iterations=-1)
+        self.assertTrue(hi_mask.any())
+        self.assertTrue(np.array_equal(
+            cmr._grow_mask(hi_mask, low_mask), expected))
+
+    def test_grow_mask_drops_unseeded_regions(self):
+        import numpy as np
+        from phangsPipeline import casaMaskingRoutines as cmr
+        low_mask = np.zeros((1, 10), dtype=bool)
+        low_mask[0, 1:4] = True
+        low_mask[0, 6:9] = True
+        hi_mask = np.zeros_like(low_mask)
+        hi_mask[0, 2] = True
+        result = cmr._grow_mask(hi_mask, low_mask)
+        self.assertTrue(result[0, 1:4].all())
+        self.assertFalse(result[0, 4:].any())
+
+    def tearDown(self):
+        os.chdir(self.current_dir)
+
+
+
+class TestingCasaMaskingRoutinesInCasa():
+    """docstring for TestingCasaMaskingRoutinesInCasa"""
+
+    def __init__(self):
+        pass
+
+    def suite(self=None):
+        testsuite = unittest.TestSuite()
+        testsuite.addTest(unittest.makeSuite(TestingCasaMaskingRoutines))
+        return testsuite
+
+    def run(self):
+        unittest.main(defaultTest='phangsPipelineTests.TestingCasaMaskingRoutinesInCasa.suite', exit=False)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,6 +20,8 @@ What will be tested:
 
 ```
 prep_sd_for_feather
+_cached_lookup
+get_targets
 
 ```
 """
@@ -58,6 +60,98 @@ class TestingHandlerKeys(unittest.TestCase):
         assert (this_kh.get_overrides('ngc3627', 'linearmosaic_deltara') == '240')
         assert (this_kh.get_overrides('ngc3627', 'something') is None)
         
+    def make_bare_key_handler(self):
+        # A KeyHandler with hand-filled dictionaries instead of keys
+        # read from disk.
+        from phangsPipeline import handlerKeys as kh
+        this_kh = kh.KeyHandler.__new__(kh.KeyHandler)
+        this_kh._lookup_cache = {}
+        this_kh._dir_for_target = {'ngc3627':'ngc3627', 'ngc3627_1':'ngc3627'}
+        this_kh._imaging_root = '/imaging/'
+        this_kh._postprocess_root = '/postprocess/'
+        this_kh._linmos_dict = {'ngc3627':['ngc3627_1']}
+        return this_kh
+
+    def test_cached_lookup(self):
+        this_kh = self.make_bare_key_handler()
+        calls = []
+        def func():
+            calls.append(1)
+            return 'value'
+        assert (this_kh._cached_lookup('thing', 'ngc3627', func) == 'value')
+        assert (this_kh._cached_lookup('thing', 'ngc3627', func) == 'value')
+        assert (len(calls) == 1)
+        # Different names or keys do not collide.
+        this_kh._cached_lookup('other', 'ngc3627', func)
+        this_kh._cached_lookup('thing', 'ngc0628', func)
+        assert (len(calls) == 3)
+        # None is the error return and is not cached.
+        none_calls = []
+        def none_func():
+            none_calls.append(1)
+            return None
+        this_kh._cached_lookup('thing', 'missing', none_func)
+        this_kh._cached_lookup('thing', 'missing', none_func)
+        assert (len(none_calls) == 2)
+
+    def test_cached_dirs_and_mosaics(self):
+        this_kh = self.make_bare_key_handler()
+        assert (this_kh.get_imaging_dir_for_target('ngc3627') == '/imaging/ngc3627/')
+        assert (this_kh.get_postprocess_dir_for_target('ngc3627') == '/postprocess/ngc3627/')
+        assert (this_kh.is_target_linmos('ngc3627'))
+        assert (not this_kh.is_target_linmos('ngc3627_1'))
+        assert (this_kh.get_parts_for_linmos('ngc3627') == ['ngc3627_1'])
+        # Changes to the dictionaries only show up after clearing.
+        this_kh._imaging_root = '/elsewhere/'
+        this_kh._linmos_dict = {}
+        assert (this_kh.get_imaging_dir_for_target('ngc3627') == '/imaging/ngc3627/')
+        assert (this_kh.is_target_linmos('ngc3627'))
+        this_kh.clear_lookup_cache()
+        assert (this_kh.get_imaging_dir_for_target('ngc3627') == '/elsewhere/ngc3627/')
+        assert (not this_kh.is_target_linmos('ngc3627'))
+        # Unknown targets keep returning None.
+        assert (this_kh.get_imaging_dir_for_target('ngc0628') is None)
+        assert (('imaging_dir', 'ngc0628') not in this_kh._lookup_cache)
+
+    def test_set_key_handler_clears_cache(self):
+        from phangsPipeline import handlerTemplate as ht
+        this_kh = self.make_bare_key_handler()
+        this_kh.get_imaging_dir_for_target('ngc3627')
+        assert (len(this_kh._lookup_cache) > 0)
+        handler = ht.HandlerTemplate.__new__(ht.HandlerTemplate)
+        handler.set_key_handler(this_kh, nobuild=True)
+        assert (len(this_kh._lookup_cache) == 0)
+
+    def test_get_targets_memo(self):
+        this_kh = self.make_bare_key_handler()
+        this_kh._target_list = ['ngc3627_1', 'ngc0628', 'ngc3627_2']
+        this_kh._whole_target_list = ['ngc0628', 'ngc3627']
+        first_list = this_kh.get_targets(only=['ngc3627_1', 'ngc3627_2'])
+        assert (first_list == ['ngc3627_1', 'ngc3627_2'])
+        # Callers get their own copy of the memoized list.
+        first_list.append('junk')
+        assert (this_kh.get_targets(only=['ngc3627_1', 'ngc3627_2']) ==
+                ['ngc3627_1', 'ngc3627_2'])
+        # Different selections do not share an entry.
+        assert (this_kh.get_targets(only=['ngc0628']) == ['ngc0628'])
+        assert (this_kh.get_targets(skip=['ngc0628']) == ['ngc3627_1', 'ngc3627_2'])
+        assert (this_kh.get_targets(first='ngc3627') == ['ngc3627_1', 'ngc3627_2'])
+        assert (this_kh.get_targets() == ['ngc0628', 'ngc3627_1', 'ngc3627_2'])
+        whole_list = this_kh.get_whole_targets()
+        whole_list.append('junk')
+        assert (this_kh.get_whole_targets() == ['ngc0628', 'ngc3627'])
+
+    def test_selection_key(self):
+        this_kh = self.make_bare_key_handler()
+        assert (this_kh._selection_key(None, 'a', ['a', 'b'], ('c',)) ==
+                (None, 'a', ('a', 'b'), ('c',)))
+        # select_from_list iterates over a bare string, so it must not
+        # share a key with a list holding that string.
+        assert (this_kh._selection_key('ab') != this_kh._selection_key(['ab']))
+        assert (this_kh._selection_key(['a', 'b']) == this_kh._selection_key(('a', 'b')))
+        assert (this_kh._selection_key(None) != this_kh._selection_key([]))
+        hash(this_kh._selection_key(None, [], ['x'], 'y'))
+
     def tearDown(self):
         os.chdir(self.current_dir)
         for this_dir in ['cleanmasks', 'reduction']: 
@@ -0,0 +1,223 @@
+"""
+How to run this test inside CASA:
+
+```
+sys.path.append('../casa_analysis_scripts')
+sys.path.append('../analysis_scripts')
+sys.path.append('.')
+import importlib
+#importlib.reload = reload
+import phangsPipeline
+importlib.reload(phangsPipeline)
+importlib.reload(phangsPipeline.handlerPostprocess)
+import phangsPipelineTests
+importlib.reload(phangsPipelineTests)
+importlib.reload(phangsPipelineTests.test_handlerPostprocess)
+phangsPipelineTests.TestingHandlerPostprocessInCasa().run()
+```
+
+What will be tested:
+
+```
+get_cube_filenames
+_fname_dict
+_is_unchanged
+_write_stamp
+
+```
+"""
+
+import os, sys, shutil
+import tempfile
+import unittest
+
+
+class FakeSingleDishKeyHandler():
+    """
+    Stand-in for handlerKeys.KeyHandler with one single dish file.
+    """
+
+    def has_singledish(self, target=None, product=None):
+        return True
+
+    def get_sd_filename(self, target=None, product=None):
+        return '/singledish/'+target+'_'+product+'.fits'
+
+    def get_imaging_dir_for_target(self, target=None, changeto=False):
+        return self.imaging_dir
+
+
+class TestingHandlerPostprocess(unittest.TestCase):
+    """docstring for TestingHandlerPostprocess"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def make_bare_handler(self, skip_unchanged=True, dry_run=False):
+        # Only the stamp helpers are used, so skip the key handler.
+        from phangsPipeline import handlerPostprocess as pph
+        handler = pph.PostProcessHandler.__new__(pph.PostProcessHandler)
+        handler.set_skip_unchanged(skip_unchanged)
+        handler.set_dry_run(dry_run)
+        return handler
+
+    def make_image(self, name):
+        # Mock up a CASA image directory with a mask subtable.
+        image = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.join(image, 'mask0'))
+        for this_file in ['table.dat', os.path.join('mask0', 'table.f0')]:
+            with open(os.path.join(image, this_file), 'w') as f:
+                f.write('data')
+        return image
+
+    def test_stamp_roundtrip(self):
+        handler = self.make_bare_handler()
+        infile = self.make_image('in.image')
+        outfile = os.path.join(self.tmp_dir, 'out.image')
+        params = {'factor':1.0, 'tags':['a', 'b']}
+        # No output yet.
+        assert (not handler._is_unchanged(infiles=[infile], outfile=outfile, params=params))
+        handler._write_stamp(infiles=[infile], outfile=outfile, params=params)
+        assert (not os.path.isfile(outfile+'.stamp'))
+        # Output present but not stamped.
+        self.make_image('out.image')
+        assert (not handler._is_unchanged(infiles=[infile], outfile=outfile, params=params))
+        handler._write_stamp(infiles=[infile], outfile=outfile, params=params)
+        assert (handler._is_unchanged(infiles=[infile], outfile=outfile, params=params))
+        # Different parameters or inputs.
+        assert (not handler._is_unchanged(infiles=[infile], outfile=outfile,
+                                          params={'factor':2.0, 'tags':['a', 'b']}))
+        assert (not handler._is_unchanged(infiles=[infile, infile+'x'], outfile=outfile,
+                                          params=params))
+
+    def test_stamp_sees_subtables(self):
+        # A change inside mask0/ of an input invalidates the stamp.
+        handler = self.make_bare_handler()
+        infile = self.make_image('in.image')
+        outfile = self.make_image('out.image')
+        handler._write_stamp(infiles=[infile], outfile=outfile)
+        assert (handler._is_unchanged(infiles=[infile], outfile=outfile))
+        with open(os.path.join(infile, 'mask0', 'table.f0'), 'a') as f:
+            f.write('more')
+        assert (not handler._is_unchanged(infiles=[infile], outfile=outfile))
+
+    def test_stamp_defaults(self):
+        # Calls without infiles or params do not share state.
+        handler = self.make_bare_handler()
+        first = handler._make_stamp()
+        first['inputs']['junk'] = None
+        assert (handler._make_stamp()['inputs'] == {})
+        assert (handler._make_stamp() == handler._make_stamp(infiles=[], params={}))
+
+    def test_stamp_switched_off(self):
+        infile = self.make_image('in.image')
+        outfile = self.make_image('out.image')
+        for handler in [self.make_bare_handler(skip_unchanged=False),
+                        self.make_bare_handler(dry_run=True)]:
+            handler._write_stamp(infiles=[infile], outfile=outfile)
+            assert (not os.path.isfile(outfile+'.stamp'))
+        handler = self.make_bare_handler()
+        handler._write_stamp(infiles=[infile], outfile=outfile)
+        handler.set_skip_unchanged(False)
+        assert (not handler._is_unchanged(infiles=[infile], outfile=outfile))
+
+    def test_get_cube_filenames(self):
+        # The spec table gives the same names as one get_cube_filename
+        # call per file.
+        from phangsPipeline import utilsFilenames
+        from phangsPipeline import handlerPostprocess as pph
+        for extra_ext in ['', '_res2p5kms']:
+            spec = [(tag, ext+extra_ext, casa, casaext)
+                    for tag, ext, casa, casaext in pph._FNAME_SPEC]
+            fname_dict = utilsFilenames.get_cube_filenames(
+                target='ngc0628', config='12m+7m', product='co21', spec=spec)
+            assert (sorted(fname_dict.keys()) ==
+                    sorted(tag for tag, ext, casa, casaext in spec))
+            for tag, ext, casa, casaext in spec:
+                assert (fname_dict[tag] == utilsFilenames.get_cube_filename(
+                    target='ngc0628', config='12m+7m', product='co21',
+                    ext=ext, casa=casa, casaext=casaext))
+        assert (fname_dict['pbcorr_trimmed_k_fits'] ==
+                'ngc0628_12m+7m_co21_pbcorr_trimmed_k_res2p5kms.fits')
+        assert (fname_dict['trimmed_pb'] ==
+                'ngc0628_12m+7m_co21_trimmed_res2p5kms.pb')
+
+    def test_fname_dict_copies(self):
+        # Cached name dictionaries are handed out as copies.
+        import pickle
+        handler = self.make_bare_handler()
+        handler._fname_cache = {}
+        handler._kh = FakeSingleDishKeyHandler()
+        first = handler._fname_dict(target='ngc0628', config='12m', product='co21',
+                                    directory='/postprocess/ngc0628/')
+        assert (first['pbcorr'] == '/postprocess/ngc0628/ngc0628_12m_co21_pbcorr.image')
+        assert (first['orig_sd'] == '/singledish/ngc0628_co21.fits')
+        assert (first['staged_sd'] == '/postprocess/ngc0628/ngc0628_singledish_co21_staged.image')
+        first['pbcorr'] = 'junk'
+        second = handler._fname_dict(target='ngc0628', config='12m', product='co21',
+                                     directory='/postprocess/ngc0628/')
+        assert (second['pbcorr'] == '/postprocess/ngc0628/ngc0628_12m_co21_pbcorr.image')
+        # The handler is sent to worker processes without the cache.
+        copied = pickle.loads(pickle.dumps(handler))
+        assert (copied._fname_cache == {})
+        assert (len(handler._fname_cache) > 0)
+
+    def test_prep_cleanup_on_error(self):
+        # A failing prep still removes the staged single dish copy and
+        # drops the shared cache.
+        handler = self.make_bare_handler()
+        handler._fname_cache = {}
+        handler._isdir_cache = None
+        handler._kh = FakeSingleDishKeyHandler()
+        handler._kh.imaging_dir = self.tmp_dir+'/'
+        self.make_image('ngc0628_12m_co21.image')
+        staged_sd = self.make_image('ngc0628_singledish_co21_staged.image')
+        def failing_recipe(target=None, product=None, config=None, **kwargs):
+            handler._sd_stage_cache[(target, product)] = staged_sd
+            raise RuntimeError('prep failed')
+        handler.recipe_prep_one_target = failing_recipe
+        try:
+            handler._prep_one_target('ngc0628', prep_dict={'ngc0628':[('co21', '12m')]})
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('RuntimeError not raised')
+        assert (handler._sd_stage_cache is None)
+        assert (not os.path.exists(staged_sd))
+
+    def test_get_cube_filenames_errors(self):
+        from phangsPipeline import utilsFilenames
+        spec = [('orig', None, True, '.image')]
+        assert (utilsFilenames.get_cube_filenames(
+            config='12m', product='co21', spec=spec) is None)
+        assert (utilsFilenames.get_cube_filenames(
+            target='ngc0628', config='12m', product=None, spec=spec) is None)
+        assert (utilsFilenames.get_cube_filenames(
+            target='ngc0628', config='12m', product='co21', spec=()) == {})
+        assert (utilsFilenames.get_cube_filenames(
+            target='ngc0628', config='12m', product='co21', spec=spec) ==
+                {'orig':'ngc0628_12m_co21.image'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+
+class TestingHandlerPostprocessInCasa():
+    """docstring for TestingHandlerPostprocessInCasa"""
+
+    def __init__(self):
+        pass
+
+    def suite(self=None):
+        testsuite = unittest.TestSuite()
+        testsuite.addTest(unittest.makeSuite(TestingHandlerPostprocess))
+        return testsuite
+
+    def run(self):
+        unittest.main(defaultTest='phangsPipelineTests.TestingHandlerPostprocessInCasa.suite', exit=False)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
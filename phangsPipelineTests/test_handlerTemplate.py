@@ -0,0 +1,266 @@
+"""
+How to run this test inside CASA:
+
+```
+sys.path.append('../casa_analysis_scripts')
+sys.path.append('../analysis_scripts')
+sys.path.append('.')
+import importlib
+#importlib.reload = reload
+import phangsPipeline
+importlib.reload(phangsPipeline)
+importlib.reload(phangsPipeline.handlerTemplate)
+import phangsPipelineTests
+importlib.reload(phangsPipelineTests)
+importlib.reload(phangsPipelineTests.test_handlerTemplate)
+phangsPipelineTests.TestingHandlerTemplateInCasa().run()
+```
+
+What will be tested:
+
+```
+looper
+batch_updates
+set_filters
+_map_over_targets
+
+```
+"""
+
+import os, sys, shutil
+import tempfile
+import unittest
+from functools import partial
+
+
+def touch_target(out_dir, target):
+    # Record that target ran. Module level so that it can be pickled.
+    with open(os.path.join(out_dir, target), 'a') as f:
+        f.write('x')
+
+
+def fail_target(out_dir, target):
+    if target == 'ngc3627':
+        raise ValueError('failed on '+target)
+    touch_target(out_dir, target)
+
+
+class FakeKeyHandler():
+    """
+    Stand-in for handlerKeys.KeyHandler that serves fixed lists and
+    counts how often the handler asks for targets.
+    """
+
+    def __init__(self):
+        self.targets = ['ngc0628', 'ngc3627', 'ngc4321']
+        self.line_products = ['co21', 'co21_2p5kms']
+        self.cont_products = ['cont']
+        self.interf_configs = ['12m', '12m+7m']
+        self.feather_configs = ['12m+7m+tp']
+        self.singledish_configs = ['tp']
+        self.n_get_targets = 0
+
+    def _select(self, master_list, only=None, skip=None, first=None, last=None):
+        from phangsPipeline import utilsLists as lu
+        return lu.select_from_list(master_list, first=first, last=last,
+                                   skip=skip, only=only, loose=True)
+
+    def get_targets(self, only=None, skip=None, first=None, last=None):
+        self.n_get_targets += 1
+        return self._select(self.targets, only=only, skip=skip,
+                            first=first, last=last)
+
+    def get_line_products(self, only=None, skip=None):
+        return self._select(self.line_products, only=only, skip=skip)
+
+    def get_continuum_products(self, only=None, skip=None):
+        return self._select(self.cont_products, only=only, skip=skip)
+
+    def get_interf_configs(self, only=None, skip=None):
+        return self._select(self.interf_configs, only=only, skip=skip)
+
+    def get_feather_configs(self, only=None, skip=None):
+        return self._select(self.feather_configs, only=only, skip=skip)
+
+    def get_singledish_configs(self, only=None, skip=None):
+        return self._select(self.singledish_configs, only=only, skip=skip)
+
+
+class TestingHandlerTemplate(unittest.TestCase):
+    """docstring for TestingHandlerTemplate"""
+
+    def make_handler(self):
+        from phangsPipeline import handlerTemplate as ht
+        this_kh = FakeKeyHandler()
+        return ht.HandlerTemplate(key_handler=this_kh), this_kh
+
+    def nested_loop(self, handler, configs):
+        # The target/product/config loop written out in full.
+        return [(this_target, this_product, this_config)
+                for this_target in handler.get_targets()
+                for this_product in handler.get_all_products()
+                for this_config in configs]
+
+    def test_looper_plan(self):
+        handler, this_kh = self.make_handler()
+        assert (list(handler.looper()) ==
+                self.nested_loop(handler, handler.get_all_configs()))
+        assert (list(handler.looper(just_interf=True)) ==
+                self.nested_loop(handler, handler.get_interf_configs()))
+        assert (list(handler.looper(just_feather=True)) ==
+                self.nested_loop(handler, handler.get_feather_configs()))
+        assert (len(list(handler.looper())) == 3 * 3 * 3)
+
+    def test_looper_slow_paths(self):
+        # Cases not served by the plan still loop over the lists.
+        handler, this_kh = self.make_handler()
+        assert (list(handler.looper(just_line=True)) ==
+                [(this_target, this_product, this_config)
+                 for this_target in handler.get_targets()
+                 for this_product in handler.get_line_products()
+                 for this_config in handler.get_all_configs()])
+        assert (list(handler.looper(just_singledish=True)) ==
+                self.nested_loop(handler, handler.get_singledish_configs()))
+        assert (list(handler.looper(do_products=False)) ==
+                [(this_target, this_config)
+                 for this_target in handler.get_targets()
+                 for this_config in handler.get_all_configs()])
+
+    def test_plan_follows_selection(self):
+        handler, this_kh = self.make_handler()
+        handler.set_targets(only=['ngc3627'])
+        handler.set_no_cont_products(True)
+        handler.set_interf_configs(skip=['12m'])
+        assert (list(handler.looper()) ==
+                [('ngc3627', 'co21', '12m+7m'),
+                 ('ngc3627', 'co21', '12m+7m+tp'),
+                 ('ngc3627', 'co21_2p5kms', '12m+7m'),
+                 ('ngc3627', 'co21_2p5kms', '12m+7m+tp')])
+        handler.set_no_feather_configs(True)
+        assert (list(handler.looper()) ==
+                [('ngc3627', 'co21', '12m+7m'),
+                 ('ngc3627', 'co21_2p5kms', '12m+7m')])
+
+    def test_plan_empty(self):
+        handler, this_kh = self.make_handler()
+        handler.set_targets(only=['not_a_target'])
+        assert (list(handler.looper()) == [])
+
+    def test_batch_updates(self):
+        # Several selections inside one block rebuild the lists once,
+        # on exit, and nested blocks leave that to the outer block.
+        handler, this_kh = self.make_handler()
+        n_start = this_kh.n_get_targets
+        with handler.batch_updates():
+            handler.set_targets(only=['ngc0628'])
+            with handler.batch_updates():
+                handler.set_line_products(only=['co21'])
+            handler.set_no_cont_products(True)
+            assert (this_kh.n_get_targets == n_start)
+        assert (this_kh.n_get_targets == n_start + 1)
+        assert (handler.get_targets() == ['ngc0628'])
+        assert (handler.get_all_products() == ['co21'])
+        assert (len(list(handler.looper())) == 3)
+
+    def test_batch_updates_no_change(self):
+        handler, this_kh = self.make_handler()
+        n_start = this_kh.n_get_targets
+        with handler.batch_updates():
+            pass
+        assert (this_kh.n_get_targets == n_start)
+
+    def test_batch_updates_exception(self):
+        # The lists are still rebuilt and batching switched off if the
+        # block raises.
+        handler, this_kh = self.make_handler()
+        try:
+            with handler.batch_updates():
+                handler.set_targets(only=['ngc4321'])
+                raise ValueError('stop')
+        except ValueError:
+            pass
+        assert (handler.get_targets() == ['ngc4321'])
+        n_start = this_kh.n_get_targets
+        handler.set_targets()
+        assert (this_kh.n_get_targets == n_start + 1)
+
+    def test_set_filters(self):
+        handler, this_kh = self.make_handler()
+        n_start = this_kh.n_get_targets
+        handler.set_filters(targets={'only':['ngc3627', 'ngc4321']},
+                            interf_configs={'skip':['12m']},
+                            feather_configs=None)
+        assert (this_kh.n_get_targets == n_start + 1)
+        assert (handler.get_targets() == ['ngc3627', 'ngc4321'])
+        assert (handler.get_interf_configs() == ['12m+7m'])
+        assert (handler.get_feather_configs() == ['12m+7m+tp'])
+
+    def test_set_filters_unknown(self):
+        # An unknown keyword changes nothing.
+        handler, this_kh = self.make_handler()
+        n_start = this_kh.n_get_targets
+        handler.set_filters(targets={'only':['ngc3627']}, not_a_filter={})
+        assert (this_kh.n_get_targets == n_start)
+        assert (handler.get_targets() == ['ngc0628', 'ngc3627', 'ngc4321'])
+
+    def run_map(self, func, max_workers):
+        handler, this_kh = self.make_handler()
+        handler.set_max_workers(max_workers)
+        out_dir = tempfile.mkdtemp()
+        try:
+            handler._map_over_targets(partial(func, out_dir), handler.get_targets())
+        finally:
+            counts = dict((this_file, len(open(os.path.join(out_dir, this_file)).read()))
+                          for this_file in os.listdir(out_dir))
+            shutil.rmtree(out_dir)
+        return counts
+
+    def test_map_over_targets(self):
+        # Every target runs exactly once, serially or in a pool.
+        expected = {'ngc0628':1, 'ngc3627':1, 'ngc4321':1}
+        assert (self.run_map(touch_target, 1) == expected)
+        assert (self.run_map(touch_target, 2) == expected)
+
+    def test_map_over_targets_errors(self):
+        # Errors from the task are raised, not retried serially.
+        for max_workers in [1, 2]:
+            try:
+                self.run_map(fail_target, max_workers)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('ValueError not raised')
+        handler, this_kh = self.make_handler()
+        handler.set_max_workers(2)
+        out_dir = tempfile.mkdtemp()
+        try:
+            try:
+                handler._map_over_targets(partial(fail_target, out_dir), handler.get_targets())
+            except ValueError:
+                pass
+            assert (sorted(os.listdir(out_dir)) == ['ngc0628', 'ngc4321'])
+            for this_file in os.listdir(out_dir):
+                assert (open(os.path.join(out_dir, this_file)).read() == 'x')
+        finally:
+            shutil.rmtree(out_dir)
+
+
+
+class TestingHandlerTemplateInCasa():
+    """docstring for TestingHandlerTemplateInCasa"""
+
+    def __init__(self):
+        pass
+
+    def suite(self=None):
+        testsuite = unittest.TestSuite()
+        testsuite.addTest(unittest.makeSuite(TestingHandlerTemplate))
+        return testsuite
+
+    def run(self):
+        unittest.main(defaultTest='phangsPipelineTests.TestingHandlerTemplateInCasa.suite', exit=False)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
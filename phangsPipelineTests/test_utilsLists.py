@@ -0,0 +1,97 @@
+"""
+How to run this test inside CASA:
+
+```
+sys.path.append('../casa_analysis_scripts')
+sys.path.append('../analysis_scripts')
+sys.path.append('.')
+import importlib
+#importlib.reload = reload
+import phangsPipeline
+importlib.reload(phangsPipeline)
+importlib.reload(phangsPipeline.utilsLists)
+import phangsPipelineTests
+importlib.reload(phangsPipelineTests)
+importlib.reload(phangsPipelineTests.test_utilsLists)
+phangsPipelineTests.TestingUtilsListsInCasa().run()
+```
+
+What will be tested:
+
+```
+select_from_list
+
+```
+"""
+
+import os, sys, shutil
+import unittest
+
+
+class TestingUtilsLists(unittest.TestCase):
+    """docstring for TestingUtilsLists"""
+
+    def __init__(self, *args, **kwargs):
+        super(TestingUtilsLists, self).__init__(*args, **kwargs)
+        self.master_list = ['ngc3627', 'NGC0628', 'ngc4321', 'IC5332', 'ngc1672']
+
+    def test_select_from_list_all(self):
+        from phangsPipeline import utilsLists as lu
+        assert (lu.select_from_list(self.master_list) ==
+                ['IC5332', 'NGC0628', 'ngc1672', 'ngc3627', 'ngc4321'])
+        assert (lu.select_from_list(self.master_list, skip=None, only=None) ==
+                lu.select_from_list(self.master_list))
+
+    def test_select_from_list_loose(self):
+        # Loose matching ignores case on both sides.
+        from phangsPipeline import utilsLists as lu
+        assert (lu.select_from_list(self.master_list, only=['NGC3627', 'ngc0628']) ==
+                ['NGC0628', 'ngc3627'])
+        assert (lu.select_from_list(self.master_list, skip=['ic5332', 'NGC1672']) ==
+                ['NGC0628', 'ngc3627', 'ngc4321'])
+        assert (lu.select_from_list(self.master_list, only=['ngc3627', 'ngc4321'],
+                                    skip=['NGC4321']) == ['ngc3627'])
+
+    def test_select_from_list_strict(self):
+        from phangsPipeline import utilsLists as lu
+        assert (lu.select_from_list(self.master_list, only=['NGC3627', 'NGC0628'],
+                                    loose=False) == ['NGC0628'])
+        assert (lu.select_from_list(self.master_list, skip=['ngc0628'],
+                                    loose=False) == lu.select_from_list(self.master_list))
+
+    def test_select_from_list_first_last(self):
+        from phangsPipeline import utilsLists as lu
+        assert (lu.select_from_list(self.master_list, first='ngc1000', last='ngc4000') ==
+                ['ngc1672', 'ngc3627'])
+        assert (lu.select_from_list(self.master_list, first='ngc1672', last='ngc3627',
+                                    loose=False) == ['ngc1672', 'ngc3627'])
+
+    def test_select_from_list_input_types(self):
+        # Sets, tuples and dictionary keys all work as inputs.
+        from phangsPipeline import utilsLists as lu
+        expected = lu.select_from_list(self.master_list, only=['ngc3627', 'ngc4321'])
+        assert (lu.select_from_list(set(self.master_list),
+                                    only=('ngc3627', 'ngc4321')) == expected)
+        assert (lu.select_from_list(dict.fromkeys(self.master_list).keys(),
+                                    only={'ngc3627', 'ngc4321'}) == expected)
+
+
+
+class TestingUtilsListsInCasa():
+    """docstring for TestingUtilsListsInCasa"""
+
+    def __init__(self):
+        pass
+
+    def suite(self=None):
+        testsuite = unittest.TestSuite()
+        testsuite.addTest(unittest.makeSuite(TestingUtilsLists))
+        return testsuite
+
+    def run(self):
+        unittest.main(defaultTest='phangsPipelineTests.TestingUtilsListsInCasa.suite', exit=False)
+
+
+
+if __name__ == '__main__':
+    unittest.main()